@@ -1,12 +1,25 @@
 #!/usr/bin/env python3
 import argparse
+import os
+import shutil
 import subprocess
 import statistics
 import json
 import math
 import re
+import tempfile
+import time
 from pathlib import Path
-from typing import List, Tuple, Dict, Any, Optional
+from typing import List, Tuple, Dict, Any, Optional, Sequence, Callable
+
+from sweep_capacity import cache_key, fit_shape, load_cache, probe_family, save_cache
+from sweep_energy import EnergyMeter
+from sweep_fit import DEFAULT_FIT_MAXITERS, fit_fixed_per_iter, pick_for_target, predict
+from sweep_archive import append_document
+from sweep_affinity import Launch, binding_context, binding_launch, device_numa_node, expand_bindings, numa_nodes
+from sweep_metrics import SweepProgress, archive_log
+from sweep_profiling import PROFILERS, profile_pairs, resolve_profiler
+from sweep_startup import TIME_PER_ITER_RE, cache_env, startup_latency, warm_cache
 
 # --- Constants & Defaults ---
 HYBRID_ROOT = Path("/home/ac.amillan/source/hybrid-paradv")
@@ -30,6 +43,13 @@ CASES = {
     "case3": {"n0": 16,    "n1": 1024, "n2": 2048},
 }
 
+# Base shapes of the capacity-probe families: the dominant axis is grown, the other two stay fixed
+FAMILY_BASE = {
+    "n0": CASES["case1"],
+    "n1": CASES["case2"],
+    "n2": CASES["case3"],
+}
+
 BEST_CONFIGS = {
     "case0": {"nsgL": 4, "nsgG": 4, "seqL": 3, "seqG": 1},
     "case1": {"nsgL": 4, "nsgG": 4, "seqL": 3, "seqG": 1},
@@ -78,9 +98,11 @@ def parse_perf(stdout: str) -> Optional[float]:
     if m: return float(m.group(1))
     return None
 
-def run_once(exe: Path, ini: Path) -> Tuple[bool, str]:
+def run_once(exe: Path, ini: Path, prefix: Sequence[str] = (), preexec_fn: Optional[Callable[[], None]] = None,
+             env: Optional[Dict[str, str]] = None) -> Tuple[bool, str]:
     try:
-        proc = subprocess.run([str(exe), str(ini)], stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, check=False)
+        proc = subprocess.run([*prefix, str(exe), str(ini)], stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, check=False,
+                              preexec_fn=preexec_fn, env={**os.environ, **env} if env else None)
         return proc.returncode == 0, proc.stdout + "\n" + proc.stderr
     except Exception as e:
         return False, f"exception: {e}"
@@ -97,25 +119,59 @@ def summarize(values: List[float]) -> Dict[str, float]:
         "stdev": statistics.stdev(values),
     }
 
-def benchmark_case(exe: Path, ini: Path, runs: int, log_output: bool = True, tag: str = "") -> Tuple[Dict[str, Any], float]:
+def benchmark_case(exe: Path, ini: Path, runs: int, log_output: bool = True, tag: str = "",
+                   progress: Optional[SweepProgress] = None, case: str = "",
+                   log_dir: Optional[Path] = None, launch: Launch = ([], None),
+                   log_name: Optional[str] = None, env: Optional[Dict[str, str]] = None,
+                   energy: Optional[EnergyMeter] = None, max_iter: Optional[int] = None) -> Tuple[Dict[str, Any], float]:
     perfs = []
+    walls: List[float] = []
+    energy_runs: List[Dict[str, Optional[float]]] = []
     for i in range(runs):
-        ok, out = run_once(exe, ini)
+        before = energy.read() if energy else None
+        t0 = time.perf_counter()
+        ok, out = run_once(exe, ini, *launch, env=env)
+        wall = time.perf_counter() - t0
+        after = energy.read() if energy else None
+        if log_dir is not None:
+            archive_log(log_dir, f"{log_name or ini.stem}_run{i+1}", out)
         if log_output:
             print(f"----- Output (run {i+1}/{runs}) [{tag}] -----", flush=True)
             print(out, flush=True)
+        perf = parse_perf(out) if ok else None
+        if progress is not None:
+            progress.run_finished(case, ok, perf)
         if not ok:
             if log_output:
                 print("Status: NON-ZERO RETURN CODE", flush=True)
             return ({"runs_completed": len(perfs), "status": "error", "bytes_per_sec": {**summarize([]), "unit": "B/s"}}, 0.0)
-        perf = parse_perf(out)
         if log_output:
             print(f"Parsed bytes/sec: {perf if perf is not None else 'NONE'}", flush=True)
         if perf is None:
             return ({"runs_completed": len(perfs), "status": "error_parse", "bytes_per_sec": {**summarize([]), "unit": "B/s"}}, 0.0)
         perfs.append(perf)
+        walls.append(wall)
+        if energy:
+            # bytes the kernels moved; unknown (so no B/J) if time_per_iter is not printed
+            m = TIME_PER_ITER_RE.search(out)
+            moved = perf * max_iter * float(m.group(1)) if m and max_iter else None
+            energy_runs.append(energy.delta(before, after, moved))
     summary = summarize(perfs)
-    return ({"runs_completed": len(perfs), "status": "ok", "bytes_per_sec": {**summary, "unit": "B/s"}}, summary['median'])
+    result = {"runs_completed": len(perfs), "status": "ok", "bytes_per_sec": {**summary, "unit": "B/s", "values": perfs},
+              "wall_sec": {**summarize(walls), "unit": "sec", "values": walls}}
+    if energy:
+        result["energy"] = {"runs": energy_runs}
+        for key, unit in (("joules", "J"), ("avg_watts", "W"), ("bytes_per_joule", "B/J")):
+            vals = [r[key] for r in energy_runs if r[key] is not None]
+            # None rather than summarize([])'s zeros when no run could be measured
+            result["energy"][key] = {**summarize(vals), "unit": unit} if vals else None
+    return (result, summary['median'])
+
+def best_binding(scores: Dict[str, List[float]]) -> Optional[str]:
+    """Binding with the best geometric mean of per-(case, maxIter) best medians."""
+    means = {b: math.exp(statistics.mean(math.log(v) for v in vals)) for b, vals in scores.items()
+             if vals and all(v > 0 for v in vals)}
+    return max(means, key=means.get) if means else None
 
 # --- Helpers to parse CLI inputs ---
 
@@ -155,21 +211,105 @@ def main():
     # Two ways to specify maxIter sweeps: repeat --maxiter, or pass --maxiters 50,100,200
     ap.add_argument("--maxiter", type=int, action='append', help="Add a maxIter value to sweep; can be repeated")
     ap.add_argument("--maxiters", type=str, help="Comma-separated list of maxIter values to sweep")
+    # Progress / metrics: full child output goes to gzipped per-run logs instead of stdout when --log-dir is set
+    ap.add_argument("--log-dir", type=Path, help="Archive each run's full output as <log-dir>/<config>_runN.log.gz "
+                                                 "(default: OUT_DIR/logs/<hw>_<impl>_<timestamp>)")
+    ap.add_argument("--print-output", action="store_true", help="Also print each run's full output (not with --dashboard)")
+    ap.add_argument("--metrics-file", type=Path, help="Prometheus text file rewritten after every run")
+    ap.add_argument("--metrics-port", type=int, help="Serve Prometheus metrics on http://127.0.0.1:PORT/metrics")
+    ap.add_argument("--dashboard", action="store_true", help="Compact live dashboard instead of per-config lines")
+    # Profiling: each profiled run is paired with an unprofiled one to track the profiler's overhead
+    ap.add_argument("--profile", choices=["auto", *PROFILERS], help="Also run selected configs under a profiler (auto = vendor tool for --hw, else perf)")
+    ap.add_argument("--profiler-cmd", type=str, help="Override the profiler command prefix; '{out}' is replaced by the output base path")
+    ap.add_argument("--profile-cases", type=str, help="Comma-separated cases to profile (default: all selected cases)")
+    ap.add_argument("--profile-pairs", type=int, default=1, help="(unprofiled, profiled) run pairs per profiled config")
+    # CPU/NUMA binding of the child process, swept like wg: none, device, node<k>, cpus:<list>, auto
+    ap.add_argument("--bindings", type=str, default="none", help="Comma-separated binding policies to sweep (default: none)")
+    # JIT caches: by default a private persistent cache per sweep, warmed once before any measured run
+    ap.add_argument("--jit-cache", type=Path, help="Persistent kernel cache directory to use and keep (default: private temp dir per sweep)")
+    ap.add_argument("--no-jit-cache", action="store_true", help="Leave runtime kernel caches at their defaults and skip pre-warming")
+    ap.add_argument("--startup-latency", action="store_true", help="Also measure cold- vs warm-cache startup latency of each case's best config")
+    ap.add_argument("--trace-first-kernel", action="store_true", help="Enable runtime API tracing in latency runs to timestamp the first kernel launch")
+    ap.add_argument("--energy", action="store_true", help="Read RAPL and GPU energy counters around every run (J, W, B/J per run)")
+    ap.add_argument("--energy-device", default=None,
+                    help="GPU whose energy --energy reads (nvidia-smi/rocm-smi index or DRM card number among the hw's cards; "
+                         "default: first of CUDA_VISIBLE_DEVICES/ROCR_VISIBLE_DEVICES/ZE_AFFINITY_MASK, else 0)")
+    # Fit wall = fixed + per_iter * maxIter per config over the maxIter sweep and pick configs for a production maxIter
+    ap.add_argument("--fit-maxiters", action="store_true", help=f"Fit fixed and per-iteration cost (adds {DEFAULT_FIT_MAXITERS} if fewer than 2 maxIters given)")
+    ap.add_argument("--target-maxiter", type=int, help="Production maxIter the fitted autotuning targets (default: largest swept maxIter)")
+    # Capacity: probe the largest shape per family once, then skip/clamp oversized cases in later sweeps
+    ap.add_argument("--probe-capacity", action="store_true", help="Bisect the maximum feasible size of each shape family (n0/n1/n2-dominant), cache it and exit")
+    ap.add_argument("--capacity-cache", type=Path, help="Capacity cache file (default: OUT_DIR/capacity.json)")
+    ap.add_argument("--archive", type=Path, help="Also append the results (with per-run samples) to this sweep_archive directory")
+    ap.add_argument("--infeasible", choices=["skip", "clamp"], default="skip", help="What to do with cases larger than the cached capacity")
     args = ap.parse_args()
+    if args.print_output and args.dashboard:
+        # printed child output would interleave with (and be erased by) the dashboard redraws
+        ap.error("--print-output cannot be combined with --dashboard")
 
     # Map CLI --impl to ini [impl].kernelImpl value
     kernel_impl = "Ndrange" if args.impl == "ndrange" else "AdaptiveWg"
 
     selected_cases = parse_cases_arg(args.cases)
     maxiters = parse_maxiters_arg(args.maxiters, args.maxiter)
+    if args.fit_maxiters and len(maxiters) < 2:
+        maxiters = sorted(set(maxiters) | set(DEFAULT_FIT_MAXITERS))
+    target_maxiter = args.target_maxiter or max(maxiters)
 
     exe = build_executable(args.impl, args.hw)
     if not exe.exists():
         raise SystemExit(f"Executable not found: {exe}")
 
+    profiler = resolve_profiler(args.profile, args.hw, args.profiler_cmd) if args.profile else None
+    profile_cases = set(parse_cases_arg(args.profile_cases)) if args.profile_cases else set(selected_cases)
+
+    nodes = numa_nodes()
+    dev_node = device_numa_node(args.hw)
+    bindings = expand_bindings(args.bindings, nodes, dev_node)
+    launches = {b: binding_launch(b, nodes, dev_node) for b in bindings}
+
     OUT_DIR.mkdir(parents=True, exist_ok=True)
     tmp_dir = OUT_DIR / "tmp_configs"
     tmp_dir.mkdir(parents=True, exist_ok=True)
+    wg_sizes = WG_SIZES if args.impl != "hybrid" else [512]
+
+    capacity_path = args.capacity_cache or OUT_DIR / "capacity.json"
+    capacity = load_cache(capacity_path)
+    cap_key = cache_key(exe, args.hw, kernel_impl)
+    if args.probe_capacity:
+        def feasible(shape: Dict[str, int]) -> Tuple[bool, Optional[str]]:
+            ini = tmp_dir / f"probe_{args.impl}_{shape['n0']}x{shape['n1']}x{shape['n2']}.ini"
+            write_ini(ini, shape, wg_sizes[0], 1, kernel_impl)
+            ok, out = run_once(exe, ini)
+            reason = None
+            if not ok:
+                last = [l for l in out.splitlines() if l.strip()]
+                reason = f"error: {last[-1].strip()[:200]}" if last else "error"
+            elif parse_perf(out) is None:
+                ok, reason = False, "no throughput in output"
+            print(f"[{args.impl}/{args.hw}] probe {shape['n0']}x{shape['n1']}x{shape['n2']}: {'ok' if ok else 'FAILED (' + reason + ')'}", flush=True)
+            return ok, reason
+        # multiples of the largest wg size keep every swept wg size a divisor of the probed axis
+        capacity[cap_key] = {axis: probe_family(feasible, base, axis, step=max(wg_sizes)) for axis, base in FAMILY_BASE.items()}
+        save_cache(capacity_path, capacity)
+        for axis, r in capacity[cap_key].items():
+            print(f"[{args.impl}/{args.hw}] {axis}-dominant: max {axis}={r['max_value']} "
+                  f"({r['max_elements']} elements{', limit: ' + r['limit_reason'] if r.get('limit_reason') else ''}"
+                  f"{'' if r['bounded'] else ', no failure found'})")
+        print(f"Wrote: {capacity_path}")
+        return
+
+    run_dims: Dict[str, Dict[str, int]] = {}
+    capacity_info: Dict[str, Dict] = {}
+    for case_name, dims in selected_cases.items():
+        fitted, info = fit_shape(dims, capacity.get(cap_key, {}), args.infeasible == "clamp")
+        if fitted is not None:
+            run_dims[case_name] = fitted
+        if info is not None:
+            capacity_info[case_name] = info
+            outcome = ("clamped to " + str(fitted) if fitted else
+                       "clamp failed: " + info["clamp_failed"] if "clamp_failed" in info else "infeasible, skipped")
+            print(f"[{args.impl}/{args.hw}] {case_name}: {outcome} ({info['elements']} > {info['max_feasible_elements']} elements)")
 
     results: Dict[str, Any] = {
         "impl": args.impl,
@@ -178,39 +318,153 @@ def main():
         "runs_per_config": args.runs,
         "cases": {},
         "maxIter_sweep": maxiters,
+        "context": binding_context(bindings, nodes, dev_node),
         "notes": {"config_source": "hybrid=best known; others=wg sweep"}
     }
+    if profiler:
+        results["profiler"] = {"name": profiler[0], "command": profiler[1]["cmd"], "pairs_per_config": args.profile_pairs}
+
+    jit_dir: Optional[Path] = None
+    jit_env: Optional[Dict[str, str]] = None
+    startup_dir: Optional[Path] = None  # warm cache of --startup-latency under --no-jit-cache
+    if not args.no_jit_cache and run_dims:
+        jit_dir = args.jit_cache or Path(tempfile.mkdtemp(prefix=f"jit-{args.hw}-{args.impl}-"))
+        warm_ini = tmp_dir / "jit_warmup.ini"
+        first_dims = next(iter(run_dims.values()))
+        write_ini(warm_ini, first_dims, wg_sizes[0], maxiters[0], kernel_impl)
+        print(f"[{args.impl}/{args.hw}] warming JIT cache in {jit_dir}", flush=True)
+        results["context"]["jit_cache"] = {"dir": str(jit_dir), "prewarmed": warm_cache([str(exe), str(warm_ini)], jit_dir)}
+        jit_env = cache_env(jit_dir)
+
+    energy: Optional[EnergyMeter] = None
+    if args.energy:
+        energy = EnergyMeter(hw=args.hw, device=args.energy_device)
+        if not energy.available():
+            raise SystemExit("--energy: no readable RAPL zone or GPU energy counter (energy_uj is often root-only)")
+        results["context"]["energy_sources"] = energy.sources()
+
+    binding_scores: Dict[str, List[float]] = {b: [] for b in bindings}
+    progress = SweepProgress(len(run_dims) * len(maxiters) * len(wg_sizes) * len(bindings), args.runs,
+                             labels={"impl": args.impl, "hw": args.hw},
+                             metrics_file=args.metrics_file, metrics_port=args.metrics_port,
+                             dashboard=args.dashboard)
+    log_dir = args.log_dir or OUT_DIR / "logs" / f"{args.hw}_{args.impl}_{time.strftime('%Y%m%d-%H%M%S')}"
+    print(f"Run outputs go to {log_dir}", flush=True)
+    log_output = args.print_output
 
     for case_name, dims in selected_cases.items():
         case_entry: Dict[str, Any] = {"problem": dims, "sweeps": {}}
+        fit_points: Dict[str, List[Tuple[int, float]]] = {}
+        if case_name in capacity_info:
+            case_entry["capacity"] = capacity_info[case_name]
+        if case_name not in run_dims:
+            # known not to fit on this device: no runs, no zero-filled result
+            status = "clamp_failed" if "clamp_failed" in case_entry.get("capacity", {}) else "infeasible"
+            case_entry["status"] = status
+            for max_iter in maxiters:
+                case_entry["sweeps"][str(max_iter)] = {"wg_size": None, "result": {"runs_completed": 0, "status": status}}
+            results["cases"][case_name] = case_entry
+            continue
+        dims = run_dims[case_name]
+        case_entry["problem"] = dims
 
         for max_iter in maxiters:
             best_result = None
             best_median = -1.0
             best_wg: Optional[int] = None
-
-            for wg in (WG_SIZES if args.impl != "hybrid" else [512]):
-                ini_path = tmp_dir / f"{case_name}_{args.impl}_wg{wg}_mi{max_iter}.ini"
-                write_ini(ini_path, dims, wg, max_iter, kernel_impl)
-                print(f"[{args.impl}/{args.hw}] {case_name} maxIter={max_iter} with wg={wg} (kernelImpl={kernel_impl})")
-                res, median = benchmark_case(exe, ini_path, args.runs, True, f"{case_name} maxIter={max_iter} wg={wg}")
-                if median > best_median:
-                    best_result = res
-                    best_median = median
-                    best_wg = wg
-
+            best_bind: Optional[str] = None
+            best_bpj = -1.0
+            best_energy_wg: Optional[int] = None
+            profiles: Dict[str, Any] = {}
+            bind_medians: Dict[str, float] = {}
+
+            for binding in bindings:
+                launch = launches[binding]
+                for wg in wg_sizes:
+                    ini_path = tmp_dir / f"{case_name}_{args.impl}_wg{wg}_mi{max_iter}.ini"
+                    write_ini(ini_path, dims, wg, max_iter, kernel_impl)
+                    run_name = ini_path.stem if binding == "none" else f"{ini_path.stem}_{binding.replace(':', '-')}"
+                    label = f"[{args.impl}/{args.hw}] {case_name} maxIter={max_iter} with wg={wg} (kernelImpl={kernel_impl})"
+                    if binding != "none":
+                        label += f" binding={binding}"
+                    if not args.dashboard:
+                        print(label)
+                    progress.config_started(label)
+                    res, median = benchmark_case(exe, ini_path, args.runs, log_output, f"{case_name} maxIter={max_iter} wg={wg} binding={binding}",
+                                                 progress=progress, case=case_name, log_dir=log_dir,
+                                                 launch=launch, log_name=run_name, env=jit_env, energy=energy,
+                                                 max_iter=max_iter)
+                    progress.config_finished()
+                    if profiler and case_name in profile_cases:
+                        key = str(wg) if len(bindings) == 1 else f"{wg}@{binding}"
+                        profiles[key] = profile_pairs(lambda prefix: run_once(exe, ini_path, [*launch[0], *prefix], launch[1], jit_env), *profiler,
+                                                      args.profile_pairs, parse_perf, OUT_DIR / "profiles" / run_name)
+                    bind_medians[binding] = max(bind_medians.get(binding, 0.0), median)
+                    fit_points.setdefault(f"{wg}@{binding}", []).extend((max_iter, w) for w in res.get("wall_sec", {}).get("values", []))
+                    bpj = (res.get("energy", {}).get("bytes_per_joule") or {}).get("median")
+                    if bpj is not None and bpj > best_bpj:
+                        best_bpj = bpj
+                        best_energy_wg = wg
+                    if median > best_median:
+                        best_result = res
+                        best_median = median
+                        best_wg = wg
+                        best_bind = binding
+
+            for binding, median in bind_medians.items():
+                binding_scores[binding].append(median)
             case_entry["sweeps"][str(max_iter)] = {
                 "wg_size": best_wg,
+                "binding": best_bind,
                 "result": best_result
             }
+            if len(bindings) > 1:
+                case_entry["sweeps"][str(max_iter)]["median_by_binding"] = bind_medians
+            if energy:
+                # energy-efficiency ranking next to the throughput one
+                case_entry["sweeps"][str(max_iter)]["wg_size_energy"] = best_energy_wg
+            if args.startup_latency and best_wg is not None:
+                ini_path = tmp_dir / f"{case_name}_{args.impl}_wg{best_wg}_mi{max_iter}.ini"
+                prefix, preexec = launches[best_bind]
+                if jit_dir is None:
+                    if startup_dir is None:
+                        startup_dir = Path(tempfile.mkdtemp(prefix=f"jit-startup-{args.hw}-{args.impl}-"))
+                    warm_cache([*prefix, str(exe), str(ini_path)], startup_dir, preexec)
+                warm_dir = jit_dir or startup_dir
+                if not args.dashboard:
+                    print(f"[{args.impl}/{args.hw}] {case_name} maxIter={max_iter} startup latency (cold vs warm)", flush=True)
+                case_entry["sweeps"][str(max_iter)]["startup"] = startup_latency(
+                    [*prefix, str(exe), str(ini_path)], args.runs, warm_dir, max_iter, preexec, args.trace_first_kernel)
+            if profiles:
+                case_entry["sweeps"][str(max_iter)]["profiles"] = profiles
+
+        if args.fit_maxiters:
+            fits = {key: fit_fixed_per_iter(points) for key, points in fit_points.items()}
+            best_key = pick_for_target(fits, target_maxiter)
+            case_entry["fit"] = {"model": "wall_sec = fixed_sec + per_iter_sec * maxIter", "target_maxIter": target_maxiter,
+                                 "configs": fits, "best": None}
+            if best_key is not None:
+                wg, _, binding = best_key.partition("@")
+                case_entry["fit"]["best"] = {"wg_size": int(wg), "binding": binding,
+                                             "predicted_wall_sec": predict(fits[best_key], target_maxiter)}
 
         results["cases"][case_name] = case_entry
 
+    progress.close()
+    results["context"]["best_binding"] = best_binding(binding_scores)
+    if jit_dir is not None and args.jit_cache is None:
+        shutil.rmtree(jit_dir, ignore_errors=True)
+    if startup_dir is not None:
+        shutil.rmtree(startup_dir, ignore_errors=True)
+
     # Output file name includes impl+hw; JSON carries full sweep info
     out_path = OUT_DIR / f"dpcpp_{args.hw}_{args.impl}.json"
     with out_path.open("w") as f:
         json.dump(results, f, indent=2)
     print(f"Wrote: {out_path}")
+    if args.archive:
+        part = append_document(args.archive, results, str(out_path), hardware=args.hw, kernel_impl=args.impl)
+        print(f"Archived: {args.archive / part['file']}" if part else f"Already archived in {args.archive}")
 
 if __name__ == "__main__":
     main()
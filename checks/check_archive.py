@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""Checks for sweep_archive: column values, part pruning and JSON round trip.
+
+    python checks/check_archive.py
+"""
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+import sweep_archive  # noqa: E402
+
+SWEEP = {
+    "impl": "ndrange", "hardware": "pvc", "executable": "/src/build_dpcpp_pvc/src/advection",
+    "runs_per_config": 2,
+    "cases": {
+        "case0": {"problem": {"n0": 8, "n1": 8, "n2": 8}, "sweeps": {
+            str(it): {"wg_size": 256, "result": {
+                "runs_completed": 2, "status": "ok",
+                "bytes_per_sec": {"mean": 2.0 * it, "median": 2.0 * it, "stdev": 0.1, "unit": "B/s",
+                                  "values": [1.9 * it, 2.1 * it]}}}
+            for it in (10, 50)}},
+        "case3": {"problem": {"n0": 1, "n1": 2, "n2": 3}, "status": "infeasible"},
+    },
+    "maxIter_sweep": [10, 50],
+}
+
+GBENCH = {
+    "context": {"executable": "/src/build_acpp_h100/main"},
+    "benchmarks": [{"name": "GlobalMem_Contiguous/1/real_time_median", "run_name": "GlobalMem_Contiguous/1/real_time",
+                    "run_type": "aggregate", "aggregate_name": "median", "real_time": 0.5, "time_unit": "ms",
+                    "bytes_per_second": 1e9, "n0": 32768.0, "n1": 256.0, "n2": 1.0}],
+}
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        archive = Path(tmp) / "archive"
+        sweep_part = sweep_archive.append_document(archive, SWEEP, "out/dpcpp_pvc_ndrange.json")
+        gb_part = sweep_archive.append_document(archive, GBENCH, "out/memory-spaces/acpp_50_reps_h100.json")
+        assert sweep_archive.append_document(archive, SWEEP, "out/dpcpp_pvc_ndrange.json") is None, "duplicate appended"
+
+        assert (sweep_part["toolchain"], sweep_part["kernel_impl"]) == ("dpcpp", "ndrange"), sweep_part
+        assert (gb_part["toolchain"], gb_part["kernel_impl"], gb_part["hardware"]) == ("acpp", "", "h100"), gb_part
+
+        rows = sweep_archive.scan(archive, ["max_iter", "wg_size", "stat", "run", "value"],
+                                  metric=["bytes_per_sec"]).to_pylist()
+        assert {r["max_iter"] for r in rows} == {10, 50}, rows
+        assert {r["wg_size"] for r in rows} == {256}, rows
+        samples = sorted(r["value"] for r in rows if r["stat"] == "run" and r["max_iter"] == 50)
+        assert samples == [1.9 * 50, 2.1 * 50], samples
+
+        assert sweep_archive.scan(archive, ["case"], toolchain=["dpcpp"]).num_rows > 0
+        assert set(sweep_archive.scan(archive, ["kernel_impl"], toolchain=["acpp"]).column("kernel_impl").to_pylist()) == {""}
+        assert sweep_archive.scan(archive, ["case"], kernel_impl=["hybrid"]).num_rows == 0
+        pruned = sweep_archive.select_parts(sweep_archive.load_manifest(archive), hardware=["h100"])
+        assert [p["file"] for p in pruned] == [gb_part["file"]], pruned
+
+        out = Path(tmp) / "export"
+        written = sweep_archive.export_documents(archive, out)
+        exported = {p.name: json.loads(p.read_text()) for p in written}
+        # json.dumps also compares key order
+        assert json.dumps(exported["dpcpp_pvc_ndrange.json"]) == json.dumps(SWEEP)
+        assert json.dumps(exported["acpp_50_reps_h100.json"]) == json.dumps(GBENCH)
+    print("sweep_archive: ok")
+
+
+if __name__ == "__main__":
+    main()
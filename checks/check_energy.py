@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""Checks for sweep_energy against the mocked tree in checks/fixtures/energy.
+
+The fixture has package-0 with a dram and a core subzone, a root-only
+package-1 (no readable energy_uj) and two xe cards: card0 has energy1 "card"
+and energy2 "pkg" (already part of energy1), card1 is another GPU of the node.
+package-0 sits just below its wrap range so a run of a few joules wraps it.
+
+    python checks/check_energy.py
+"""
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+FIXTURE = ROOT / "checks" / "fixtures" / "energy"
+
+
+def bump(root: Path, rel: str, delta: int, wrap: int = 0) -> None:
+    path = root / rel
+    value = int(path.read_text()) + delta
+    path.write_text(f"{value - wrap if wrap and value > wrap else value}\n")
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp) / "sys"
+        shutil.copytree(FIXTURE, root)
+        os.environ["SWEEP_POWERCAP_ROOT"] = str(root)
+        sys.path.insert(0, str(ROOT))
+        import sweep_affinity
+        import sweep_energy
+
+        # the energy mock must not redirect NUMA detection
+        assert sweep_affinity.SYS_ROOT == Path(os.environ.get("SWEEP_SYSFS_ROOT", "/sys")), sweep_affinity.SYS_ROOT
+
+        os.environ.pop("ZE_AFFINITY_MASK", None)
+        meter = sweep_energy.EnergyMeter(hw="pvc")
+        assert meter.available()
+        assert meter.sources() == {
+            "host": ["intel-rapl:0/package-0", "intel-rapl:0:0/dram"],
+            "gpu": [str(root / "class/drm/card0/device/hwmon/hwmon3/energy1_input")],
+            "gpu_device": "0",
+        }, meter.sources()
+        # the benchmark's device only, from the runtime's mask or given explicitly
+        os.environ["ZE_AFFINITY_MASK"] = "1.0"
+        assert sweep_energy.EnergyMeter(hw="pvc").sources()["gpu"] == [str(root / "class/drm/card1/device/hwmon/hwmon4/energy1_input")]
+        assert sweep_energy.EnergyMeter(hw="pvc", device="0").sources()["gpu"] == meter.sources()["gpu"]
+        # no NVIDIA card in the fixture: the Intel counters must not stand in for one
+        assert not any("class/drm" in g for g in sweep_energy.EnergyMeter(hw="h100").sources()["gpu"])
+
+        before = meter.read()
+        bump(root, "class/powercap/intel-rapl:0/energy_uj", 2_000_000, wrap=262143328850)  # wraps
+        bump(root, "class/powercap/intel-rapl:0:0/energy_uj", 500_000)
+        bump(root, "class/powercap/intel-rapl:0:1/energy_uj", 9_000_000)  # core: not counted
+        bump(root, "class/drm/card0/device/hwmon/hwmon3/energy1_input", 3_000_000)
+        bump(root, "class/drm/card0/device/hwmon/hwmon3/energy2_input", 2_000_000)  # pkg: inside energy1
+        bump(root, "class/drm/card1/device/hwmon/hwmon4/energy1_input", 7_000_000)  # other GPU
+        after = meter.read()
+        after["t"] = before["t"] + 2.0
+
+        d = meter.delta(before, after, bytes_moved=1e9 * 10 * 0.15)  # 1 GB/s over 10 iterations of 0.15 s
+        assert abs(d["host_joules"] - 2.5) < 1e-9, d
+        assert abs(d["gpu_joules"] - 3.0) < 1e-9, d
+        assert abs(d["joules"] - 5.5) < 1e-9, d
+        assert abs(d["avg_watts"] - 2.75) < 1e-9, d
+        # 1.5 GB moved for 5.5 J, not throughput over the 2 s average power
+        assert abs(d["bytes_per_joule"] - 1.5e9 / 5.5) < 1e-3, d
+
+        # static counters: no energy, so no B/J instead of a fake 0
+        later = {**after, "t": after["t"] + 1.0}
+        d = meter.delta(after, later, bytes_moved=1.5e9)
+        assert d["joules"] == 0 and d["bytes_per_joule"] is None, d
+    print("sweep_energy: ok")
+
+
+if __name__ == "__main__":
+    main()
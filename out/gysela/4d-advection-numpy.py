@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""CPU reference for the 4d-advection miniapp: NumPy semi-Lagrangian directional splitting.
+
+f(x, y, vx, vy) is stored C-contiguous as (nx, ny, nvx, nvy) and every step
+advects it along GridX (velocity vx), GridY (vy), GridVx (field Ex(x, y)) and
+GridVy (Ey(x, y)). Each direction is a batched 1D cubic Lagrange interpolation
+done with np.take_along_axis on the untransposed array; the batch is split over
+threads along another axis (NumPy releases the GIL in gathers and arithmetic).
+Boundary conditions are periodic in all four dimensions.
+
+Timings are printed as "GridX ========== Kernel time: <sec>" lines, the format
+parsed by run-expe-bkma.py / run-expe-gysela.py.
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+DIRECTIONS = ["GridX", "GridY", "GridVx", "GridVy"]
+
+DEFAULTS = {
+    "nx": 128, "ny": 128, "nvx": 64, "nvy": 64,
+    "maxIter": 10, "dt": 0.01,
+    "Lx": 2 * np.pi, "Ly": 2 * np.pi, "vmax": 6.0,
+    "efield": 0.1,
+    "threads": os.cpu_count() or 1,
+}
+
+
+def read_conf(path: Path) -> Dict[str, str]:
+    """`key = value` lines of a 4d-advection.ini-style file (sections and comments ignored)."""
+    conf = {}
+    for line in path.read_text().splitlines():
+        line = line.split("#")[0].split(";")[0].strip()
+        if "=" in line and not line.startswith("["):
+            key, value = (t.strip() for t in line.split("=", 1))
+            conf[key] = value
+    return conf
+
+
+def lagrange3_weights(t: np.ndarray) -> List[np.ndarray]:
+    """Cubic Lagrange weights for stencil offsets -1, 0, 1, 2 at fractional position t in [0, 1)."""
+    return [
+        -t * (t - 1) * (t - 2) / 6,
+        (t + 1) * (t - 1) * (t - 2) / 2,
+        -(t + 1) * t * (t - 2) / 2,
+        (t + 1) * t * (t - 1) / 6,
+    ]
+
+
+class Advector4D:
+    def __init__(self, p: Dict, dtype=np.float64):
+        self.p = p
+        self.shape = (p["nx"], p["ny"], p["nvx"], p["nvy"])
+        self.dx, self.dy = p["Lx"] / p["nx"], p["Ly"] / p["ny"]
+        self.dvx, self.dvy = 2 * p["vmax"] / p["nvx"], 2 * p["vmax"] / p["nvy"]
+        self.x = np.arange(p["nx"]) * self.dx
+        self.y = np.arange(p["ny"]) * self.dy
+        self.vx = -p["vmax"] + np.arange(p["nvx"]) * self.dvx
+        self.vy = -p["vmax"] + np.arange(p["nvy"]) * self.dvy
+        self.dtype = dtype
+        self.pool = ThreadPoolExecutor(max_workers=p["threads"])
+        self.n_threads = p["threads"]
+        self.plans = {d: self._plan(d) for d in DIRECTIONS}
+
+    def displacement(self, direction: str) -> Tuple[int, np.ndarray]:
+        """(axis, displacement in cells broadcastable to f with size 1 on that axis)."""
+        dt, e = self.p["dt"], self.p["efield"]
+        if direction == "GridX":
+            return 0, (self.vx * dt / self.dx).reshape(1, 1, -1, 1)
+        if direction == "GridY":
+            return 1, (self.vy * dt / self.dy).reshape(1, 1, 1, -1)
+        ex = e * np.sin(2 * np.pi * self.x / self.p["Lx"])[:, None] * np.ones((1, len(self.y)))
+        ey = e * np.cos(2 * np.pi * self.y / self.p["Ly"])[None, :] * np.ones((len(self.x), 1))
+        if direction == "GridVx":
+            return 2, (ex * dt / self.dvx).reshape(len(self.x), len(self.y), 1, 1)
+        return 3, (ey * dt / self.dvy).reshape(len(self.x), len(self.y), 1, 1)
+
+    def _plan(self, direction: str) -> Dict:
+        """Gather indices and weights of the 4-point stencil, precomputed once (fields are static)."""
+        axis, a = self.displacement(direction)
+        n = self.shape[axis]
+        foot = -a                                   # departure point relative to the node, in cells
+        s = np.floor(foot)
+        weights = [w.astype(self.dtype) for w in lagrange3_weights(foot - s)]
+        node_shape = [1, 1, 1, 1]
+        node_shape[axis] = n
+        nodes = np.arange(n).reshape(node_shape)
+        idx = [((nodes + s.astype(np.intp) + off) % n).astype(np.intp) for off in (-1, 0, 1, 2)]
+        # split the batch along the largest other axis
+        split = max((ax for ax in range(4) if ax != axis), key=lambda ax: self.shape[ax])
+        bounds = np.linspace(0, self.shape[split], min(self.n_threads, self.shape[split]) + 1).astype(int)
+        return {"axis": axis, "idx": idx, "w": weights, "split": split,
+                "chunks": [(int(lo), int(hi)) for lo, hi in zip(bounds[:-1], bounds[1:])]}
+
+    @staticmethod
+    def _slice(arr: np.ndarray, split: int, lo: int, hi: int) -> np.ndarray:
+        if arr.shape[split] == 1:
+            return arr
+        sl = [slice(None)] * arr.ndim
+        sl[split] = slice(lo, hi)
+        return arr[tuple(sl)]
+
+    def advect(self, direction: str, f: np.ndarray, out: np.ndarray) -> None:
+        plan = self.plans[direction]
+        axis, split = plan["axis"], plan["split"]
+
+        def work(chunk: Tuple[int, int]) -> None:
+            lo, hi = chunk
+            src = self._slice(f, split, lo, hi)
+            dst = self._slice(out, split, lo, hi)
+            for k, (idx, w) in enumerate(zip(plan["idx"], plan["w"])):
+                term = np.take_along_axis(src, self._slice(idx, split, lo, hi), axis=axis)
+                term *= self._slice(w, split, lo, hi)
+                if k == 0:
+                    np.copyto(dst, term)
+                else:
+                    dst += term
+
+        list(self.pool.map(work, plan["chunks"]))
+
+    def initial(self) -> np.ndarray:
+        """Smooth and periodic in all four dimensions, so one step has a closed-form solution."""
+        return self.exact(None)
+
+    def exact(self, direction) -> np.ndarray:
+        """Initial condition, or its exact value after one step along `direction`."""
+        # cell coordinates along each axis, one broadcastable array per axis
+        cells = [np.arange(n, dtype=np.float64).reshape([-1 if ax == k else 1 for ax in range(4)])
+                 for k, n in enumerate(self.shape)]
+        if direction is not None:
+            axis, a = self.displacement(direction)
+            cells[axis] = cells[axis] - a
+        kx, ky, kvx, kvy = (2 * np.pi * c / n for c, n in zip(cells, self.shape))
+        f = (1.0 + 0.5 * np.sin(kx)) * (1.0 + 0.5 * np.cos(ky)) * (1.0 + 0.5 * np.sin(kvx)) * (1.0 + 0.5 * np.cos(kvy))
+        return np.broadcast_to(f, self.shape).astype(self.dtype)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="NumPy 4D split-advection baseline (GridX/GridY/GridVx/GridVy)")
+    ap.add_argument("conf", nargs="?", type=Path, help="4d-advection.ini-style file with nx/ny/nvx/nvy (and optionally maxIter, dt, threads)")
+    for key in ("nx", "ny", "nvx", "nvy", "maxIter", "threads"):
+        ap.add_argument(f"--{key}", type=int)
+    ap.add_argument("--dt", type=float)
+    ap.add_argument("--float32", action="store_true", help="Single precision (default: double, like the miniapp)")
+    ap.add_argument("--check", action="store_true", help="Compare one step per direction with the exact solution and report mass drift")
+    args = ap.parse_args()
+
+    p = dict(DEFAULTS)
+    if args.conf:
+        for key, value in read_conf(args.conf).items():
+            if key in p:
+                p[key] = type(DEFAULTS[key])(float(value)) if isinstance(DEFAULTS[key], int) else float(value)
+    for key in ("nx", "ny", "nvx", "nvy", "maxIter", "threads", "dt"):
+        if getattr(args, key) is not None:
+            p[key] = getattr(args, key)
+
+    adv = Advector4D(p, np.float32 if args.float32 else np.float64)
+    print(f"nx = {p['nx']}, ny = {p['ny']}, nvx = {p['nvx']}, nvy = {p['nvy']}, "
+          f"maxIter = {p['maxIter']}, threads = {p['threads']}, dtype = {adv.dtype.__name__}", flush=True)
+
+    f = adv.initial()
+    out = np.empty_like(f)
+
+    if args.check:
+        for d in DIRECTIONS:
+            adv.advect(d, f, out)
+            err = float(np.max(np.abs(out - adv.exact(d))))
+            print(f"{d} max error after one step: {err:.3e}", flush=True)
+
+    mass0 = float(f.sum(dtype=np.float64))
+    for _ in range(p["maxIter"]):
+        for d in DIRECTIONS:
+            t0 = time.perf_counter()
+            adv.advect(d, f, out)
+            dt = time.perf_counter() - t0
+            f, out = out, f
+            print(f"{d} ========== Kernel time: {dt:.9f}", flush=True)
+
+    if args.check:
+        print(f"relative mass drift: {abs(float(f.sum(dtype=np.float64)) - mass0) / mass0:.3e}", flush=True)
+    adv.pool.shutdown()
+
+
+if __name__ == "__main__":
+    main()
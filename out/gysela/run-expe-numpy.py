@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# CPU baseline for the 4d-advection miniapp: same configurations, parsing and
+# output layout as run-expe-bkma.py, with 4d-advection-numpy.py as the executable.
+# Per-direction speedups of the miniapp over NumPy are printed when
+# benchmark_results_miniapp.json is present.
+
+import os
+import sys
+import subprocess
+import re
+import json
+import statistics
+
+# Sizes to test
+configurations = [
+    {"nx": 128, "ny": 128, "nvx": 64, "nvy": 64},
+    {"nx": 1024, "ny": 1024, "nvx": 32, "nvy": 32},
+    {"nx": 512, "ny": 512, "nvx": 64, "nvy": 64},
+]
+
+# Paths
+here = os.path.dirname(os.path.abspath(__file__))
+executable = [sys.executable, os.path.join(here, "4d-advection-numpy.py")]
+results_file = "benchmark_results_numpy.json"
+reference_file = os.path.join(here, "benchmark_results_miniapp.json")
+runs = int(os.environ.get("NUMPY_ADVECTION_RUNS", 50))
+
+def run_simulation(cfg, cfg_str, run_id):
+    log_file = f"run_numpy_{cfg_str}_{run_id}.log"
+    args = [f"--{k}={v}" for k, v in cfg.items()]
+    with open(log_file, 'w') as out:
+        subprocess.run(executable + args, stdout=out, stderr=subprocess.STDOUT)
+    return log_file
+
+def parse_kernel_times(log_file):
+    data = {"GridX": [], "GridY": [], "GridVx": [], "GridVy": []}
+    pattern = re.compile(r"(GridX|GridY|GridVx|GridVy)\s+=+ Kernel time: ([\d\.]+)")
+    with open(log_file, 'r') as f:
+        for line in f:
+            match = pattern.search(line)
+            if match:
+                key, val = match.groups()
+                data[key].append(float(val))
+    return data
+
+def aggregate_stats(data):
+    stats = {}
+    for key, values in data.items():
+        if values:
+            stats[key] = {
+                "mean": statistics.mean(values),
+                "median": statistics.median(values),
+                "std": statistics.stdev(values) if len(values) > 1 else 0.0
+            }
+    return stats
+
+def compare_with_reference(results):
+    if not os.path.exists(reference_file):
+        return
+    with open(reference_file) as f:
+        reference = json.load(f)
+    dims = ("nx", "ny", "nvx", "nvy")
+    by_shape = {tuple(r[k] for k in dims): r["stats"] for r in reference}
+    for entry in results:
+        ref = by_shape.get(tuple(entry[k] for k in dims))
+        if ref is None:
+            continue
+        speedups = ", ".join(f"{key} x{entry['stats'][key]['median'] / ref[key]['median']:.1f}"
+                             for key in entry["stats"] if key in ref and ref[key]["median"] > 0)
+        print(f"{entry['nx']}x{entry['ny']}x{entry['nvx']}x{entry['nvy']} miniapp speedup over NumPy (median): {speedups}")
+
+if __name__ == "__main__":
+    results = []
+
+    for cfg in configurations:
+        cfg_str = f"{cfg['nx']}x{cfg['nvx']}_Y{cfg['ny']}x{cfg['nvy']}"
+        print(f"Running config: {cfg_str}")
+        all_data = {"GridX": [], "GridY": [], "GridVx": [], "GridVy": []}
+
+        for i in range(runs):
+            log = run_simulation(cfg, cfg_str, i + 1)
+            run_data = parse_kernel_times(log)
+            for key in all_data:
+                all_data[key].extend(run_data.get(key, []))
+
+        result_entry = {
+            "nx": cfg['nx'],
+            "ny": cfg['ny'],
+            "nvx": cfg['nvx'],
+            "nvy": cfg['nvy'],
+            "stats": aggregate_stats(all_data)
+        }
+        results.append(result_entry)
+
+    with open(results_file, "w") as f:
+        json.dump(results, f, indent=2)
+
+    print(f"Benchmark complete. Results saved to {results_file}")
+    compare_with_reference(results)
@@ -1,4 +1,5 @@
 #!/usr/bin/env python3
+import argparse
 import subprocess
 import statistics
 import json
@@ -7,6 +8,8 @@ import shutil
 import re
 from pathlib import Path
 
+from sweep_refine import refine_sizes
+
 # --- Config ---
 BASE_INI = Path("/home/ac.amillan/source/parallel-advection/build_cuda_ldg/src/advection.ini")
 EXE = Path("/home/ac.amillan/source/parallel-advection/build_cuda_ldg/src/advection")
@@ -16,6 +19,9 @@ N0 = 16384*2
 N1 = 1024
 N2_VALUES = [2**i for i in range(11)]  # 1 to 1024
 KERNEL_IMPLS = ["ndrange", "ldg"]
+# --adaptive: start from this coarse ladder, then bisect where either kernel's throughput changes fastest
+ADAPTIVE_COARSE = [1, 8, 64, 512, 1024]
+ADAPTIVE_BUDGET = 8  # n2 points, each run for every kernel (the dense grid uses len(N2_VALUES))
 
 THROUGHPUT_RE = re.compile(r"\bestim(?:ated)?_throughput\s*:\s*([0-9]*\.?[0-9]+)\s*GB/s", re.IGNORECASE)
 TIME_PER_ITER_RE = re.compile(r"time_per_iter\s*\(sec\)\s*:\s*([0-9]*\.?[0-9]+)", re.IGNORECASE)
@@ -83,19 +89,35 @@ def modify_ini(base_path: Path, n2: int, kernel: str) -> Path:
                 f.write(line)
     return temp_ini
 
+def run_n2(results: dict, kernel: str, n2: int) -> float:
+    ini_path = modify_ini(BASE_INI, n2, kernel)
+    print(f"Running: kernel={kernel}, n2={n2}")
+    result = run_case(ini_path)
+    results["cases"][f"{kernel}_n2_{n2}"] = {
+        "n0": N0, "n1": N1, "n2": n2,
+        **result
+    }
+    shutil.rmtree(ini_path.parent)
+    return result["estimated_throughput"]["median"]
+
 def main():
+    ap = argparse.ArgumentParser(description="ndrange vs ldg throughput over n2")
+    ap.add_argument("--adaptive", action="store_true", help="Refine the n2 grid around throughput knees instead of the dense power-of-two grid")
+    ap.add_argument("--budget", type=int, default=ADAPTIVE_BUDGET, help="n2 points in --adaptive mode (every kernel runs at each)")
+    ap.add_argument("--coarse", type=str, help="Comma-separated starting n2 values for --adaptive")
+    args = ap.parse_args()
+
+    coarse = [int(x) for x in args.coarse.split(",")] if args.coarse else ADAPTIVE_COARSE
     results = {"executable": str(EXE), "cases": {}}
 
-    for kernel in KERNEL_IMPLS:
-        for n2 in N2_VALUES:
-            ini_path = modify_ini(BASE_INI, n2, kernel)
-            print(f"Running: kernel={kernel}, n2={n2}")
-            result = run_case(ini_path)
-            results["cases"][f"{kernel}_n2_{n2}"] = {
-                "n0": N0, "n1": N1, "n2": n2,
-                **result
-            }
-            shutil.rmtree(ini_path.parent)
+    if args.adaptive:
+        # one shared n2 grid so ndrange and ldg stay comparable point by point
+        _, log = refine_sizes(lambda n2: [run_n2(results, kernel, n2) for kernel in KERNEL_IMPLS], coarse, args.budget)
+        results["refinement"] = {"kernels": KERNEL_IMPLS, "log": log}
+    else:
+        for kernel in KERNEL_IMPLS:
+            for n2 in N2_VALUES:
+                run_n2(results, kernel, n2)
 
     OUT_JSON.parent.mkdir(parents=True, exist_ok=True)
     with open(OUT_JSON, "w") as f:
@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""Host-side counterpart of main.cpp: same index maps, same n0 x n1 x n2 spans.
+
+Writes a Google Benchmark-style JSON (same layout as out/memory-spaces-new/strided)
+so host and device PP curves can be loaded by the same notebook code.
+"""
+import argparse
+import json
+import os
+import platform
+import socket
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from math import gcd
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+# --- Config ---
+OUT_DIR      = Path("/home/ac.amillan/source/phd-experiments/out/memory-spaces-new/strided")
+N_TOTAL      = 4194304 * 2   # get_range_with_constraint() in utils.hpp
+N1           = 128 * 2
+N2_VALUES    = [2**i for i in range(11)]  # Range(1,1024), RangeMultiplier(2)
+REPETITIONS  = 10
+MIN_TIME     = 0.1           # seconds per repetition, like --benchmark_min_time
+LOCAL_BYTES  = 256 * 1024    # size of the per-thread staging buffer ("local memory")
+SEED         = 42
+
+PATTERNS = {"Contiguous": "Contiguous", "Stride": "Strided", "Indirect": "Indirect"}
+MEM_SPACES = ["GlobalMem", "LocalMem"]
+
+MASK64 = (1 << 64) - 1
+
+
+# --- Index maps (bit-exact with main.cpp when built against libstdc++ >= 11) ---
+
+class MT19937_64:
+    """std::mt19937_64"""
+    def __init__(self, seed: int = 5489):
+        self.mt = [0] * 312
+        self.mt[0] = seed & MASK64
+        for i in range(1, 312):
+            self.mt[i] = (6364136223846793005 * (self.mt[i-1] ^ (self.mt[i-1] >> 62)) + i) & MASK64
+        self.idx = 312
+
+    def _twist(self) -> None:
+        mt = self.mt
+        for i in range(312):
+            y = (mt[i] & 0xFFFFFFFF80000000) | (mt[(i+1) % 312] & 0x7FFFFFFF)
+            v = mt[(i+156) % 312] ^ (y >> 1)
+            if y & 1:
+                v ^= 0xB5026F5AA96619E9
+            mt[i] = v
+        self.idx = 0
+
+    def __call__(self) -> int:
+        if self.idx >= 312:
+            self._twist()
+        y = self.mt[self.idx]
+        self.idx += 1
+        y ^= (y >> 29) & 0x5555555555555555
+        y ^= (y << 17) & 0x71D67FFFEDA60000
+        y ^= (y << 37) & 0xFFF7EEE000000000
+        y ^= y >> 43
+        return y & MASK64
+
+
+def uniform_int(g: MT19937_64, a: int, b: int) -> int:
+    """libstdc++ uniform_int_distribution<uint64_t>{a, b}(g) for a 64-bit engine (Lemire)."""
+    erange = b - a + 1
+    product = g() * erange
+    low = product & MASK64
+    if low < erange:
+        threshold = ((1 << 64) - erange) % erange
+        while low < threshold:
+            product = g() * erange
+            low = product & MASK64
+    return (product >> 64) + a
+
+
+def std_shuffle(v: List[int], g: MT19937_64) -> None:
+    """libstdc++ std::shuffle (draws two swap positions per engine call when it can)."""
+    n = len(v)
+    if n == 0:
+        return
+    if MASK64 // n >= n:
+        i = 1
+        if n % 2 == 0:
+            j = uniform_int(g, 0, 1)
+            v[i], v[j] = v[j], v[i]
+            i += 1
+        while i != n:
+            b0 = i + 1
+            x = uniform_int(g, 0, b0 * (b0 + 1) - 1)
+            p0, p1 = x // (b0 + 1), x % (b0 + 1)
+            v[i], v[p0] = v[p0], v[i]
+            i += 1
+            v[i], v[p1] = v[p1], v[i]
+            i += 1
+        return
+    for i in range(1, n):
+        j = uniform_int(g, 0, i)
+        v[i], v[j] = v[j], v[i]
+
+
+def coprime_or_next(stride: int, n1: int) -> int:
+    if gcd(stride, n1) == 1:
+        return stride
+    for s in range(stride + 1, stride + 64):
+        if gcd(s, n1) == 1:
+            return s
+    return 1  # fallback (contiguous)
+
+
+def make_index_map(pattern: str, n1: int, n2: int, seed: int = SEED) -> np.ndarray:
+    if pattern == "Contiguous":
+        idx = list(range(n1))
+    elif pattern == "Strided":
+        stride = coprime_or_next(max(1, n2 % n1), n1)  # tie stride to n2
+        idx = [(i * stride) % n1 for i in range(n1)]
+    else:  # Indirect
+        idx = list(range(n1))
+        std_shuffle(idx, MT19937_64(seed))
+    return np.asarray(idx, dtype=np.intp)
+
+
+# --- Kernels ---
+
+def get_range_with_constraint(n2: int):
+    return N_TOTAL // N1 // n2, N1, n2
+
+
+def split_rows(n0: int, n_threads: int) -> List[slice]:
+    n_chunks = max(1, min(n_threads, n0))
+    bounds = np.linspace(0, n0, n_chunks + 1).astype(int)
+    return [slice(int(lo), int(hi)) for lo, hi in zip(bounds[:-1], bounds[1:])]
+
+
+class HostAccessBench:
+    """One (mem_space, pattern, n2, threads) instance with its buffers allocated up front."""
+
+    def __init__(self, mem_space: str, pattern: str, n2: int, n_threads: int):
+        self.n0, self.n1, self.n2 = get_range_with_constraint(n2)
+        self.mem_space = mem_space
+        self.contiguous = pattern == "Contiguous"
+        self.idx = make_index_map(pattern, self.n1, self.n2)
+        self.bias = (0.0001 * self.idx.astype(np.float64))[None, :, None]
+        i0, i1, i2 = np.ogrid[:self.n0, :self.n1, :self.n2]
+        self.data = np.cos((i0 + i1 + i2).astype(np.float64))
+        self.scratch = np.zeros_like(self.data) if mem_space == "GlobalMem" else None
+        self.chunks = split_rows(self.n0, n_threads)
+        self.pool = ThreadPoolExecutor(max_workers=len(self.chunks))
+        if mem_space == "GlobalMem":
+            self.tmp = [np.empty((c.stop - c.start, self.n1, self.n2)) for c in self.chunks]
+        else:
+            rows = max(1, LOCAL_BYTES // (self.n1 * self.n2 * self.data.itemsize))
+            self.tmp = [np.empty((min(rows, c.stop - c.start), self.n1, self.n2)) for c in self.chunks]
+
+    def _global(self, k: int) -> None:
+        rows = self.chunks[k]
+        tmp = self.tmp[k]
+        if self.contiguous:
+            np.add(self.data[rows], self.bias, out=self.scratch[rows])
+            return
+        np.take(self.data[rows], self.idx, axis=1, out=tmp)      # gather
+        np.add(tmp, self.bias, out=tmp)
+        self.scratch[rows][:, self.idx, :] = tmp                  # scatter
+
+    def _local(self, k: int) -> None:
+        rows = self.chunks[k]
+        buf = self.tmp[k]
+        step = buf.shape[0]
+        for lo in range(rows.start, rows.stop, step):
+            hi = min(lo + step, rows.stop)
+            line = buf[:hi - lo]
+            np.copyto(line, self.data[lo:hi])                     # stage into "local"
+            if self.contiguous:
+                np.add(line, self.bias, out=line)
+            else:
+                line[:, self.idx, :] = line[:, self.idx, :] + self.bias
+        if rows.start == 0:
+            self.data[0, 0, 0] = buf[0, 0, 0]                     # one cheap write-back
+
+    def iteration(self) -> None:
+        fn = self._global if self.mem_space == "GlobalMem" else self._local
+        list(self.pool.map(fn, range(len(self.chunks))))
+
+    def close(self) -> None:
+        self.pool.shutdown()
+
+    def bytes_per_iteration(self) -> int:
+        return self.n0 * self.n1 * self.n2 * self.data.itemsize * 2
+
+
+def run_repetition(bench: HostAccessBench, min_time: float):
+    bench.iteration()  # warmup
+    n_iter = 0
+    t0, c0 = time.perf_counter(), time.process_time()
+    while True:
+        bench.iteration()
+        n_iter += 1
+        elapsed = time.perf_counter() - t0
+        if elapsed >= min_time:
+            break
+    return n_iter, elapsed, time.process_time() - c0
+
+
+# --- Google Benchmark-style JSON ---
+
+def read_caches() -> List[Dict[str, int]]:
+    caches = []
+    root = Path("/sys/devices/system/cpu/cpu0/cache")
+    for d in sorted(root.glob("index*")):
+        try:
+            size = (d / "size").read_text().strip()
+            mult = {"K": 1024, "M": 1024**2}.get(size[-1], 1)
+            n_sharing = 0
+            for tok in (d / "shared_cpu_list").read_text().strip().split(","):
+                lo, _, hi = tok.partition("-")
+                n_sharing += int(hi or lo) - int(lo) + 1
+            caches.append({
+                "type": (d / "type").read_text().strip(),
+                "level": int((d / "level").read_text()),
+                "size": int(size.rstrip("KM")) * mult,
+                "num_sharing": n_sharing,
+            })
+        except (OSError, ValueError):
+            continue
+    return caches
+
+
+def make_context() -> Dict:
+    return {
+        "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "host_name": socket.gethostname(),
+        "executable": f"{sys.executable} {Path(__file__).resolve()}",
+        "num_cpus": os.cpu_count(),
+        "mhz_per_cpu": 0,
+        "cpu_scaling_enabled": False,
+        "caches": read_caches(),
+        "load_avg": list(os.getloadavg()),
+        "library_build_type": "release",
+        "numpy_version": np.__version__,
+        "python_version": platform.python_version(),
+    }
+
+
+def aggregate_entries(family: str, family_index: int, instance_index: int, bench: HostAccessBench,
+                      n_threads: int, reps: List[tuple]) -> List[Dict]:
+    run_name = f"{family}/{bench.n2}/real_time/threads:{n_threads}"
+    real_ms = [1e3 * t / n for n, t, _ in reps]
+    cpu_ms = [1e3 * c / n for n, _, c in reps]
+    bps = [bench.bytes_per_iteration() * n / t for n, t, _ in reps]
+    ips = [b / (2 * bench.data.itemsize) for b in bps]
+    counters = {"gpu": 0.0, "n0": bench.n0, "n1": bench.n1, "n2": bench.n2,
+                "w0": 1, "w1": bench.n1, "w2": 1}
+
+    def stdev(v): return statistics.stdev(v) if len(v) > 1 else 0.0
+    def cv(v): return stdev(v) / statistics.mean(v) if statistics.mean(v) else 0.0
+
+    aggs = [("mean", "time", statistics.mean), ("median", "time", statistics.median),
+            ("stddev", "time", stdev), ("cv", "percentage", cv)]
+    entries = []
+    for agg, unit, f in aggs:
+        entries.append({
+            "name": f"{run_name}_{agg}",
+            "family_index": family_index,
+            "per_family_instance_index": instance_index,
+            "run_name": run_name,
+            "run_type": "aggregate",
+            "repetitions": len(reps),
+            "threads": n_threads,
+            "aggregate_name": agg,
+            "aggregate_unit": unit,
+            "iterations": reps[0][0],
+            "real_time": f(real_ms),
+            "cpu_time": f(cpu_ms),
+            "time_unit": "ms",
+            "bytes_per_second": f(bps),
+            "items_per_second": f(ips),
+            # like Google Benchmark, dispersion aggregates zero the user counters
+            **({k: float(v) for k, v in counters.items()} if agg in ("mean", "median")
+               else {k: 0.0 for k in counters}),
+        })
+    return entries
+
+
+def parse_int_list(arg: Optional[str], default: List[int]) -> List[int]:
+    if not arg:
+        return default
+    return sorted({int(tok) for tok in arg.split(",") if tok.strip()})
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Host NumPy gather/scatter benchmark reproducing main.cpp access patterns")
+    ap.add_argument("--n2", type=str, help="Comma-separated n2 values (default: 1,2,4,...,1024)")
+    ap.add_argument("--threads", type=str, help=f"Comma-separated thread counts (default: 1,{os.cpu_count()})")
+    ap.add_argument("--patterns", type=str, default=",".join(PATTERNS), help="Subset of Contiguous,Stride,Indirect")
+    ap.add_argument("--mem", type=str, default=",".join(MEM_SPACES), help="Subset of GlobalMem,LocalMem")
+    ap.add_argument("--repetitions", type=int, default=REPETITIONS)
+    ap.add_argument("--min-time", type=float, default=MIN_TIME, help="Seconds per repetition")
+    ap.add_argument("--out", type=Path, default=OUT_DIR / f"numpy_{socket.gethostname()}.json")
+    args = ap.parse_args()
+
+    n2_values = parse_int_list(args.n2, N2_VALUES)
+    thread_counts = parse_int_list(args.threads, sorted({1, os.cpu_count() or 1}))
+    patterns = [p.strip() for p in args.patterns.split(",") if p.strip()]
+    mem_spaces = [m.strip() for m in args.mem.split(",") if m.strip()]
+    unknown = [p for p in patterns if p not in PATTERNS] + [m for m in mem_spaces if m not in MEM_SPACES]
+    if unknown:
+        raise SystemExit(f"Unknown pattern/memory space: {', '.join(unknown)}")
+    bad_n2 = [n2 for n2 in n2_values if n2 < 1 or N_TOTAL % (N1 * n2)]
+    if bad_n2:
+        raise SystemExit(f"n2 must divide {N_TOTAL // N1}: {bad_n2}")
+
+    results = {"context": make_context(), "benchmarks": []}
+    family_index = 0
+    for mem in mem_spaces:
+        for pat in patterns:
+            family = f"{mem}_{pat}_SweepJ1"
+            instance = 0
+            for n2 in n2_values:
+                for n_threads in thread_counts:
+                    bench = HostAccessBench(mem, PATTERNS[pat], n2, n_threads)
+                    try:
+                        reps = [run_repetition(bench, args.min_time) for _ in range(args.repetitions)]
+                    finally:
+                        bench.close()
+                    entries = aggregate_entries(family, family_index, instance, bench, n_threads, reps)
+                    results["benchmarks"].extend(entries)
+                    print(f"[host] {family} n2={n2} threads={n_threads}: "
+                          f"median={entries[1]['bytes_per_second'] / 1e9:.3f} GB/s", flush=True)
+                    instance += 1
+            family_index += 1
+
+    args.out.parent.mkdir(parents=True, exist_ok=True)
+    with args.out.open("w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Wrote: {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""CPU / NUMA binding policies for RUN.py / run-hybrid.py child processes.
+
+Policies (--bindings):
+    none        launch as before, no binding
+    device      CPUs (and preferred memory) of the GPU's NUMA node, or of the
+                nearest node with CPUs when the GPU's node has none
+    node<k>     CPUs (and preferred memory) of NUMA node k
+    cpus:<list> explicit CPU list, e.g. cpus:0-15,96-111
+    auto        none + device + every NUMA node
+
+Binding uses `numactl` when it is installed, otherwise `os.sched_setaffinity`
+in the child (CPU affinity only, no memory policy).
+"""
+import os
+import shutil
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+SYS_ROOT = Path(os.environ.get("SWEEP_SYSFS_ROOT", "/sys"))
+
+# PCI vendor ids of the GPUs behind each --hw
+PCI_VENDOR = {"h100": "0x10de", "mi300": "0x1002", "pvc": "0x8086"}
+# VGA, 3D and other display controllers, processing accelerators
+GPU_PCI_CLASSES = ("0x0300", "0x0302", "0x0380", "0x1200")
+
+Launch = Tuple[List[str], Optional[Callable[[], None]]]
+
+
+def parse_cpulist(text: str) -> List[int]:
+    cpus: List[int] = []
+    for tok in text.strip().split(","):
+        if not tok:
+            continue
+        lo, _, hi = tok.partition("-")
+        cpus.extend(range(int(lo), int(hi or lo) + 1))
+    return cpus
+
+
+def format_cpulist(cpus: Sequence[int]) -> str:
+    out, cpus = [], sorted(cpus)
+    i = 0
+    while i < len(cpus):
+        j = i
+        while j + 1 < len(cpus) and cpus[j + 1] == cpus[j] + 1:
+            j += 1
+        out.append(str(cpus[i]) if i == j else f"{cpus[i]}-{cpus[j]}")
+        i = j + 1
+    return ",".join(out)
+
+
+def numa_nodes() -> Dict[int, List[int]]:
+    """NUMA node -> CPUs, from sysfs. Nodes without CPUs (HBM/CXL-only) are skipped."""
+    nodes = {}
+    for d in sorted((SYS_ROOT / "devices" / "system" / "node").glob("node[0-9]*")):
+        try:
+            cpus = parse_cpulist((d / "cpulist").read_text())
+        except OSError:
+            continue
+        if cpus:
+            nodes[int(d.name[4:])] = cpus
+    return nodes
+
+
+def device_numa_node(hw: str) -> Optional[int]:
+    """NUMA node of the first GPU of the --hw vendor, from /sys/bus/pci/devices.
+
+    PCI devices rather than DRM cards: compute-only NVIDIA GPUs often have no
+    /sys/class/drm entry.
+    """
+    vendor = PCI_VENDOR.get(hw)
+    for dev in sorted((SYS_ROOT / "bus" / "pci" / "devices").glob("*")):
+        try:
+            if not (dev / "class").read_text().strip().lower().startswith(GPU_PCI_CLASSES):
+                continue
+            if vendor and (dev / "vendor").read_text().strip().lower() != vendor:
+                continue
+            node = int((dev / "numa_node").read_text())
+        except (OSError, ValueError):
+            continue
+        if node >= 0:
+            return node
+    return None
+
+
+def nearest_cpu_node(node: Optional[int], nodes: Dict[int, List[int]]) -> Optional[int]:
+    """`node` if it has CPUs, else the node with CPUs closest to it by sysfs distance (None if none)."""
+    if node is None or node in nodes:
+        return node
+    if not nodes:
+        return None
+    try:
+        dist = [int(d) for d in (SYS_ROOT / "devices" / "system" / "node" / f"node{node}" / "distance").read_text().split()]
+    except (OSError, ValueError):
+        dist = []
+    # distance lists every node in id order; fall back to id proximity if it is missing
+    return min(nodes, key=lambda k: (dist[k] if k < len(dist) else float("inf"), abs(k - node), k))
+
+
+def expand_bindings(arg: Optional[str], nodes: Dict[int, List[int]], dev_node: Optional[int]) -> List[str]:
+    if not arg:
+        return ["none"]
+    policies: List[str] = []
+    for tok in [t.strip() for t in arg.split(",") if t.strip()]:
+        if tok == "auto":
+            device = ["device"] if nearest_cpu_node(dev_node, nodes) is not None else []
+            policies += ["none"] + device + [f"node{k}" for k in nodes]
+        elif tok.startswith("cpus:"):
+            policies.append(tok)
+        elif tok in ("none", "device") or (tok.startswith("node") and tok[4:].isdigit()):
+            policies.append(tok)
+        else:
+            # cpus:<list> contains commas; glue trailing list items back on
+            if policies and policies[-1].startswith("cpus:") and tok[0].isdigit():
+                policies[-1] += f",{tok}"
+            else:
+                raise SystemExit(f"Unknown binding policy: {tok}")
+    for p in policies:
+        if p == "device" and dev_node is None:
+            raise SystemExit("Binding 'device' requested but the GPU's NUMA node could not be detected")
+        if p == "device" and nearest_cpu_node(dev_node, nodes) is None:
+            raise SystemExit(f"Binding 'device' requested but no NUMA node has CPUs (GPU node: {dev_node})")
+        if p.startswith("node") and int(p[4:]) not in nodes:
+            raise SystemExit(f"Unknown NUMA node in binding '{p}'. Available: {', '.join(map(str, nodes))}")
+    return list(dict.fromkeys(policies))
+
+
+def binding_launch(policy: str, nodes: Dict[int, List[int]], dev_node: Optional[int]) -> Launch:
+    """(command prefix, preexec_fn) applying `policy` to a child process."""
+    if policy == "none":
+        return [], None
+    if policy.startswith("cpus:"):
+        node, cpus = None, parse_cpulist(policy[5:])
+    else:
+        node = nearest_cpu_node(dev_node, nodes) if policy == "device" else int(policy[4:])
+        cpus = nodes[node]
+    if shutil.which("numactl"):
+        if node is None:
+            return ["numactl", f"--physcpubind={format_cpulist(cpus)}", "--"], None
+        return ["numactl", f"--cpunodebind={node}", f"--preferred={node}", "--"], None
+    return [], lambda: os.sched_setaffinity(0, cpus)
+
+
+def binding_context(policies: List[str], nodes: Dict[int, List[int]], dev_node: Optional[int]) -> Dict:
+    return {
+        "num_cpus": os.cpu_count(),
+        "numa_nodes": {str(k): format_cpulist(v) for k, v in nodes.items()},
+        "device_numa_node": dev_node,
+        "device_cpu_node": nearest_cpu_node(dev_node, nodes),
+        "binding_policies": policies,
+        "binding_tool": "numactl" if shutil.which("numactl") else "sched_setaffinity",
+    }
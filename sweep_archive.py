@@ -0,0 +1,424 @@
+"""Append-only compressed archive of sweep and benchmark results (Arrow IPC + zstd).
+
+Every numeric leaf of a result JSON becomes one row of a long table:
+
+    source layout hardware toolchain kernel_impl case family entry n0 n1 n2
+    max_iter wg_size metric stat run value integer unit path skeleton
+
+`toolchain` is the compiler (dpcpp, acpp, cuda, numpy) and `kernel_impl` the
+kernel variant of RUN.py sweeps (ndrange, hybrid, adaptivewg), both taken from
+the document or guessed from the file name and executable path.
+
+`metric`/`stat` come from the leaf's position: the dotted keys below the
+innermost "result" (bytes_per_sec, energy.joules, ...) and the statistic
+(median, ..., "run" for samples of "values"/"runs" lists with `run` = sample
+index, "value" otherwise). Google Benchmark entries use their aggregate_name.
+`path` and `skeleton` (the entry with its numbers blanked out) are
+dictionary-encoded and let `export` rebuild the original document; headers
+such as the Google Benchmark `context` are stored once per file in the schema
+metadata instead of once per entry.
+
+Layouts understood: Google Benchmark ({context, benchmarks}), RUN.py /
+run-hybrid.py and run-cuda-ldg.py ({..., cases: {...}}) and the Gysela
+miniapp lists ([{nx, ny, nvx, nvy, stats}]).
+
+An archive is a directory. Each import appends one part file written in
+chunks of CHUNK_ROWS rows, plus an entry in manifest.json listing the part's
+hardware, toolchain, kernel_impl and cases. `scan` uses the manifest to skip
+whole parts (predicate pushdown on those columns), memory-maps the remaining
+ones and reads only the requested columns.
+
+    python sweep_archive.py import ARCHIVE out/**/*.json
+    python sweep_archive.py query ARCHIVE --hardware h100 --metric bytes_per_sec --columns case,stat,value
+    python sweep_archive.py export ARCHIVE OUT_DIR
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+MANIFEST = "manifest.json"
+CHUNK_ROWS = 1 << 16
+HARDWARE = ("mi300", "pvc", "h100")
+TOOLCHAINS = ("dpcpp", "acpp", "cuda", "numpy")
+KERNEL_IMPLS = ("ndrange", "hybrid", "adaptivewg")
+# Columns the manifest records per part, so filters on them skip whole parts
+PART_KEYS = ("hardware", "toolchain", "kernel_impl", "case")
+
+STAT_KEYS = {"mean", "median", "stdev", "std", "stddev", "cv", "min", "max"}
+# Keys that only group other values and never name a metric themselves
+CONTAINERS = {"values", "runs", "result", "stats", "sweeps", "problem"}
+SAMPLE_LISTS = {"values", "runs"}
+GB_UNITS = {"bytes_per_second": "B/s", "items_per_second": "items/s"}
+
+STRING_COLUMNS = ("source", "layout", "hardware", "toolchain", "kernel_impl", "case", "family", "metric", "stat", "unit", "path", "skeleton")
+
+
+def _arrow():
+    try:
+        import pyarrow
+        import pyarrow.compute
+        import pyarrow.ipc
+    except ImportError:
+        raise SystemExit("sweep_archive requires pyarrow (pip install pyarrow)")
+    return pyarrow
+
+
+def schema():
+    pa = _arrow()
+    dict_str = pa.dictionary(pa.int32(), pa.string())
+    types = {
+        "entry": pa.int32(), "n0": pa.int64(), "n1": pa.int64(), "n2": pa.int64(),
+        "max_iter": pa.int32(), "wg_size": pa.int32(), "run": pa.int32(),
+        "value": pa.float64(), "integer": pa.bool_(),
+    }
+    order = ("source", "layout", "hardware", "toolchain", "kernel_impl", "case", "family", "entry", "n0", "n1", "n2",
+             "max_iter", "wg_size", "metric", "stat", "run", "value", "integer", "unit", "path", "skeleton")
+    return pa.schema([pa.field(name, dict_str if name in STRING_COLUMNS else types[name]) for name in order])
+
+
+# --- JSON -> rows ---
+
+def _is_number(v: Any) -> bool:
+    return isinstance(v, (int, float)) and not isinstance(v, bool)
+
+
+def _leaves(node: Any, path: Tuple = ()) -> Iterator[Tuple[Tuple, Any]]:
+    if isinstance(node, dict):
+        for k, v in node.items():
+            yield from _leaves(v, path + (k,))
+    elif isinstance(node, list):
+        for i, v in enumerate(node):
+            yield from _leaves(v, path + (i,))
+    elif _is_number(node):
+        yield path, node
+
+
+def _skeleton(node: Any) -> Any:
+    """`node` with every numeric leaf replaced by None."""
+    if isinstance(node, dict):
+        return {k: _skeleton(v) for k, v in node.items()}
+    if isinstance(node, list):
+        return [_skeleton(v) for v in node]
+    return None if _is_number(node) else node
+
+
+def _leaf_meta(root: Any, path: Tuple) -> Dict[str, Any]:
+    """metric, stat, run, unit, max_iter and wg_size of the leaf at `path`."""
+    keys = [k for k in path if isinstance(k, str)]
+    # per-run samples live in "values" lists or "runs" lists of dicts
+    run = next((i for k, i in zip(reversed(path[:-1]), reversed(path[1:]))
+                if isinstance(i, int) and k in SAMPLE_LISTS), None)
+    stat = "run" if run is not None else "value"
+    if keys and keys[-1] in STAT_KEYS:
+        stat, run = keys.pop(), None
+    max_iter = None
+    if "sweeps" in keys:
+        after = keys.index("sweeps") + 1
+        if after < len(keys) and keys[after].isdigit():
+            max_iter = int(keys[after])
+    if "result" in keys:
+        keys = keys[len(keys) - keys[::-1].index("result"):]
+    names = [k for k in keys if k not in CONTAINERS and not k.isdigit()]
+    unit = wg = None
+    node = root
+    for k in path[:-1]:
+        if isinstance(node, dict):
+            unit = node["unit"] if isinstance(node.get("unit"), str) else unit
+            wg = node["wg_size"] if _is_number(node.get("wg_size")) else wg
+        node = node[k]
+    if isinstance(node, dict):
+        unit = node["unit"] if isinstance(node.get("unit"), str) else unit
+    return {"metric": ".".join(names) or (keys[-1] if keys else ""), "stat": stat,
+            "run": run, "unit": unit or "", "max_iter": max_iter, "wg_size": wg}
+
+
+def _guess(names: Sequence[str], choices: Sequence[str]) -> str:
+    """First of `choices` appearing as a _/-/ separated token of `names`, checked in order."""
+    for name in names:
+        tokens = str(name).replace("-", "_").replace("/", "_").split("_")
+        found = next((c for c in choices if c in tokens), None)
+        if found:
+            return found
+    return ""
+
+
+def _entries(doc: Any, source: str) -> Tuple[str, Any, List[Tuple[str, Dict]]]:
+    """(layout, header with the entries blanked out, [(case label, entry)])."""
+    if isinstance(doc, dict) and isinstance(doc.get("benchmarks"), list):
+        return "gbench", {**doc, "benchmarks": None}, [(b.get("run_name", b.get("name", "")), b) for b in doc["benchmarks"]]
+    if isinstance(doc, dict) and isinstance(doc.get("cases"), dict):
+        return "cases", {**doc, "cases": None}, list(doc["cases"].items())
+    if isinstance(doc, list) and all(isinstance(e, dict) for e in doc):
+        dims = ("nx", "ny", "nvx", "nvy")
+        return "list", None, [("x".join(str(e[d]) for d in dims) if all(d in e for d in dims) else str(i), e)
+                              for i, e in enumerate(doc)]
+    raise SystemExit(f"{source}: unrecognized result layout")
+
+
+def flatten(doc: Any, source: str, hardware: Optional[str] = None, toolchain: Optional[str] = None,
+            kernel_impl: Optional[str] = None) -> Tuple[Dict[str, List], Dict]:
+    """Column lists for `doc` and the part metadata (layout, header, hardware, toolchain, kernel_impl)."""
+    layout, header, entries = _entries(doc, source)
+    names = [Path(source).stem]
+    if isinstance(doc, dict):
+        hardware = hardware or doc.get("hardware")
+        kernel_impl = kernel_impl or doc.get("impl")
+        names += [doc.get("executable") or doc.get("context", {}).get("executable") or ""]
+    hardware = hardware or _guess(names, HARDWARE)
+    toolchain = toolchain or _guess(names, TOOLCHAINS)
+    kernel_impl = kernel_impl or _guess(names[:1], KERNEL_IMPLS)
+    cols: Dict[str, List] = {f.name: [] for f in schema()}
+    for e, (case, entry) in enumerate(entries):
+        dims = entry.get("problem", entry) if isinstance(entry.get("problem"), dict) else entry
+        shape = [int(dims[a]) if _is_number(dims.get(a)) else None for a in ("n0", "n1", "n2")]
+        family = case.split("/")[0] if layout == "gbench" else ""
+        skeleton = json.dumps(_skeleton(entry))
+        leaves = list(_leaves(entry)) or [(None, None)]  # keep entries without numbers
+        for path, value in leaves:
+            meta = _leaf_meta(entry, path) if path is not None else \
+                {"metric": "", "stat": "none", "run": None, "unit": "", "max_iter": None, "wg_size": None}
+            if layout == "gbench" and path is not None:
+                aggregate = entry.get("run_type") == "aggregate"
+                meta["stat"] = entry.get("aggregate_name", "") if aggregate else "run"
+                meta["run"] = None if aggregate else entry.get("repetition_index")
+                meta["unit"] = entry.get("time_unit", "") if meta["metric"] in ("real_time", "cpu_time") \
+                    else GB_UNITS.get(meta["metric"], "")
+            row = {
+                "source": source, "layout": layout, "hardware": hardware, "toolchain": toolchain,
+                "kernel_impl": kernel_impl, "case": case,
+                "family": family, "entry": e, "n0": shape[0], "n1": shape[1], "n2": shape[2],
+                "max_iter": meta["max_iter"], "wg_size": meta["wg_size"], "metric": meta["metric"],
+                "stat": meta["stat"], "run": meta["run"],
+                "value": float(value) if value is not None else None, "integer": isinstance(value, int),
+                "unit": meta["unit"], "path": json.dumps(list(path)) if path is not None else "null",
+                "skeleton": skeleton,
+            }
+            for k, v in row.items():
+                cols[k].append(v)
+    return cols, {"layout": layout, "header": header, "hardware": hardware, "toolchain": toolchain,
+                  "kernel_impl": kernel_impl}
+
+
+# --- rows -> JSON ---
+
+def _set(node: Any, path: Sequence, value: Any) -> None:
+    for k in path[:-1]:
+        node = node[k]
+    node[path[-1]] = value
+
+
+def unflatten(table, meta: Dict) -> Any:
+    """Rebuild the original document from one part's rows and metadata."""
+    entries: Dict[int, Any] = {}
+    cases: Dict[int, str] = {}
+    cols = {name: table.column(name).to_pylist() for name in ("entry", "case", "path", "value", "integer", "skeleton")}
+    for e, case, path, value, integer, skel in zip(*(cols[n] for n in ("entry", "case", "path", "value", "integer", "skeleton"))):
+        if e not in entries:
+            entries[e] = json.loads(skel)
+            cases[e] = case
+        path = json.loads(path)
+        if path is not None:
+            _set(entries[e], path, int(value) if integer else value)
+    ordered = [entries[e] for e in sorted(entries)]
+    if meta["layout"] == "gbench":
+        return {**meta["header"], "benchmarks": ordered}
+    if meta["layout"] == "cases":
+        return {**meta["header"], "cases": {cases[e]: entries[e] for e in sorted(entries)}}
+    return ordered
+
+
+# --- archive ---
+
+def load_manifest(archive: Path) -> Dict[str, Any]:
+    path = archive / MANIFEST
+    return json.loads(path.read_text()) if path.exists() else {"parts": []}
+
+
+def _save_manifest(archive: Path, manifest: Dict[str, Any]) -> None:
+    tmp = archive / f".{MANIFEST}.tmp"
+    tmp.write_text(json.dumps(manifest, indent=2))
+    os.replace(tmp, archive / MANIFEST)
+
+
+def append_document(archive: Path, doc: Any, source: str, hardware: Optional[str] = None,
+                    toolchain: Optional[str] = None, kernel_impl: Optional[str] = None, compression: Optional[str] = "zstd",
+                    force: bool = False) -> Optional[Dict[str, Any]]:
+    """Write `doc` as a new part; returns its manifest entry, or None if this exact document is already archived."""
+    pa = _arrow()
+    archive.mkdir(parents=True, exist_ok=True)
+    manifest = load_manifest(archive)
+    digest = hashlib.sha256(json.dumps(doc, sort_keys=True).encode()).hexdigest()
+    if not force and any(p["sha256"] == digest for p in manifest["parts"]):
+        return None
+    cols, meta = flatten(doc, source, hardware, toolchain, kernel_impl)
+    sch = schema()
+    arrays = [pa.array(cols[f.name], type=pa.string()).dictionary_encode() if f.name in STRING_COLUMNS
+              else pa.array(cols[f.name], type=f.type) for f in sch]
+    table = pa.Table.from_arrays(arrays, schema=sch.with_metadata({"sweep_archive": json.dumps({**meta, "source": source})}))
+
+    name = f"part-{len(manifest['parts']):06d}-{meta['hardware'] or 'unknown'}.arrow"
+    tmp = archive / f".{name}.tmp"
+    options = pa.ipc.IpcWriteOptions(compression=compression)
+    with pa.OSFile(str(tmp), "wb") as sink, pa.ipc.new_file(sink, table.schema, options=options) as writer:
+        writer.write_table(table, max_chunksize=CHUNK_ROWS)
+    os.replace(tmp, archive / name)
+
+    part = {
+        "file": name, "source": source, "sha256": digest, "layout": meta["layout"],
+        "hardware": meta["hardware"], "toolchain": meta["toolchain"], "kernel_impl": meta["kernel_impl"],
+        "cases": sorted(set(cols["case"])), "rows": table.num_rows,
+        "bytes": (archive / name).stat().st_size, "added": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    manifest["parts"].append(part)
+    _save_manifest(archive, manifest)
+    return part
+
+
+def append_json(archive: Path, json_path: Path, **kwargs) -> Optional[Dict[str, Any]]:
+    return append_document(archive, json.loads(json_path.read_text()), str(json_path), **kwargs)
+
+
+def select_parts(manifest: Dict[str, Any], source: Optional[str] = None,
+                 **filters: Optional[Sequence[str]]) -> List[Dict[str, Any]]:
+    """Parts that can contain matching rows, decided from the manifest alone (filters on PART_KEYS)."""
+    def keep(p: Dict[str, Any]) -> bool:
+        for key, values in filters.items():
+            if not values or key not in PART_KEYS:
+                continue
+            if key == "case":
+                if not set(values) & set(p["cases"]):
+                    return False
+            elif p.get(key) not in values:
+                return False
+        return not source or source in p["source"]
+    return [p for p in manifest["parts"] if keep(p)]
+
+
+def read_part(archive: Path, part: Dict[str, Any], columns: Optional[Sequence[str]] = None):
+    """Memory-map one part and decode only `columns` (all if None)."""
+    pa = _arrow()
+    names = schema().names
+    included = [names.index(c) for c in columns] if columns is not None else None
+    reader = pa.ipc.open_file(pa.memory_map(str(archive / part["file"])),
+                              options=pa.ipc.IpcReadOptions(included_fields=included))
+    return reader.read_all()
+
+
+def part_meta(archive: Path, part: Dict[str, Any]) -> Dict[str, Any]:
+    pa = _arrow()
+    reader = pa.ipc.open_file(pa.memory_map(str(archive / part["file"])))
+    return json.loads(reader.schema.metadata[b"sweep_archive"])
+
+
+def scan(archive: Path, columns: Optional[Sequence[str]] = None, **filters: Optional[Sequence[str]]):
+    """Rows of every part matching `filters` (column -> accepted values), restricted to `columns`.
+
+    hardware/toolchain/kernel_impl/case also prune whole parts through the manifest; other string
+    columns (metric, stat, unit, ...) are filtered after reading.
+    """
+    pa = _arrow()
+    pc = pa.compute
+    filters = {k: list(v) for k, v in filters.items() if v}
+    unknown = set(filters) - set(STRING_COLUMNS)
+    if unknown:
+        raise SystemExit(f"Cannot filter on: {', '.join(sorted(unknown))}")
+    wanted = list(columns) if columns is not None else schema().names
+    read_cols = wanted + [c for c in filters if c not in wanted]
+    parts = select_parts(load_manifest(archive), **filters)
+    tables = []
+    for part in parts:
+        table = read_part(archive, part, read_cols)
+        for col, values in filters.items():
+            table = table.filter(pc.is_in(table.column(col).cast(pa.string()), value_set=pa.array(values, pa.string())))
+        if table.num_rows:
+            tables.append(table.select(wanted).replace_schema_metadata(None))
+    if not tables:
+        return schema().empty_table().select(wanted)
+    return pa.concat_tables(tables, promote_options="permissive")
+
+
+def export_documents(archive: Path, out_dir: Path, source: Optional[str] = None,
+                     **filters: Optional[Sequence[str]]) -> List[Path]:
+    """Write each archived document matching the part-level filters back to JSON in its original layout."""
+    out_dir.mkdir(parents=True, exist_ok=True)
+    written = []
+    parts = select_parts(load_manifest(archive), source, **filters)
+    for part in parts:
+        doc = unflatten(read_part(archive, part, ("entry", "case", "path", "value", "integer", "skeleton")), part_meta(archive, part))
+        out = out_dir / Path(part["source"]).name
+        if out in written:
+            out = out_dir / f"{Path(part['file']).stem}_{Path(part['source']).name}"
+        with out.open("w") as f:
+            json.dump(doc, f, indent=2)
+        written.append(out)
+    return written
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Compact Arrow IPC archive of result JSON files")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    imp = sub.add_parser("import", help="Append result JSON files to the archive")
+    imp.add_argument("archive", type=Path)
+    imp.add_argument("files", type=Path, nargs="+")
+    imp.add_argument("--hardware", type=str, help="Hardware label (default: from the document or file name)")
+    imp.add_argument("--toolchain", type=str, help="Compiler label (default: guessed from the file name or executable)")
+    imp.add_argument("--kernel-impl", type=str, help="Kernel implementation label (default: from the document or file name)")
+    imp.add_argument("--compression", choices=["zstd", "lz4", "none"], default="zstd",
+                     help="Buffer compression; 'none' gives zero-copy memory-mapped reads at the cost of size")
+    imp.add_argument("--force", action="store_true", help="Append even if an identical document is already archived")
+
+    for name, help_text in (("query", "Print matching rows as CSV"), ("export", "Rebuild the original JSON files"), ("ls", "List parts")):
+        p = sub.add_parser(name, help=help_text)
+        p.add_argument("archive", type=Path)
+        if name == "export":
+            p.add_argument("out_dir", type=Path)
+            p.add_argument("--source", type=str, help="Only documents whose source path contains this string")
+        for col in PART_KEYS + (("metric", "stat", "family") if name == "query" else ()):
+            p.add_argument(f"--{col.replace('_', '-')}", dest=col, type=str, help=f"Comma-separated {col} values to keep")
+        if name == "query":
+            p.add_argument("--columns", type=str, default="hardware,toolchain,kernel_impl,case,max_iter,wg_size,metric,stat,run,value,unit")
+    args = ap.parse_args()
+
+    def split(v: Optional[str]) -> Optional[List[str]]:
+        return [t.strip() for t in v.split(",") if t.strip()] if v else None
+
+    if args.cmd == "import":
+        for path in args.files:
+            part = append_json(args.archive, path, hardware=args.hardware, toolchain=args.toolchain,
+                               kernel_impl=args.kernel_impl,
+                               compression=None if args.compression == "none" else args.compression, force=args.force)
+            if part is None:
+                print(f"{path}: already archived, skipped")
+            else:
+                print(f"{path}: {part['rows']} rows, {path.stat().st_size} -> {part['bytes']} bytes ({part['file']})")
+    elif args.cmd == "query":
+        pa = _arrow()
+        import pyarrow.csv
+        filters = {c: split(getattr(args, c)) for c in PART_KEYS + ("metric", "stat", "family")}
+        table = scan(args.archive, split(args.columns), **filters)
+        # CSV cannot hold dictionary types
+        table = table.cast(pa.schema([pa.field(f.name, f.type.value_type if pa.types.is_dictionary(f.type) else f.type)
+                                      for f in table.schema]))
+        pyarrow.csv.write_csv(table, sys.stdout.buffer)
+    elif args.cmd == "export":
+        filters = {c: split(getattr(args, c)) for c in PART_KEYS}
+        for out in export_documents(args.archive, args.out_dir, source=args.source, **filters):
+            print(f"Wrote: {out}")
+    else:
+        manifest = load_manifest(args.archive)
+        parts = select_parts(manifest, **{c: split(getattr(args, c)) for c in PART_KEYS})
+        for p in parts:
+            print(f"{p['file']}  {p['layout']:<6} {p['hardware'] or '-':<6} {p['toolchain'] or '-':<6} "
+                  f"{p['kernel_impl'] or '-':<10} "
+                  f"{p['rows']:>7} rows {p['bytes']:>9} B  {p['source']}")
+        print(f"{len(parts)} part(s), {sum(p['rows'] for p in parts)} rows, {sum(p['bytes'] for p in parts)} bytes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""Maximum feasible problem size per executable, kernel implementation, device and shape family.
+
+A shape family is named after its dominant axis (n0, n1 or n2). The probe
+keeps the two other axes of the family's base shape fixed, grows the dominant
+one by doubling until a run fails, then bisects between the last feasible and
+the first infeasible value. Probed values stay multiples of `step` (the
+work-group size) so a run rejected for divisibility or work-group limits is not
+taken for a memory limit, and every probe keeps the reason it failed. The
+result is cached as a total element count so sweeps can mark larger shapes
+"infeasible" (or clamp them) up front instead of recording a failed run full of
+zeros.
+"""
+import json
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple, Union
+
+AXES = ("n0", "n1", "n2")
+MAX_DOUBLINGS = 24
+
+
+def family_of(dims: Dict[str, int]) -> str:
+    """Dominant axis of a shape (first one on ties)."""
+    return max(AXES, key=lambda a: dims[a])
+
+
+def total_elements(dims: Dict[str, int]) -> int:
+    return dims["n0"] * dims["n1"] * dims["n2"]
+
+
+Feasibility = Union[bool, Tuple[bool, Optional[str]]]
+
+
+def probe_family(is_feasible: Callable[[Dict[str, int]], Feasibility], base: Dict[str, int], axis: str,
+                 rel_tol: float = 1 / 64, step: int = 1) -> Dict[str, object]:
+    """Largest feasible multiple of `step` for `axis` with the other axes of `base` fixed.
+
+    `is_feasible` returns a bool or (bool, failure reason).
+    """
+    def shape(v: int) -> Dict[str, int]:
+        return {**base, axis: v}
+
+    probes = []
+
+    def check(v: int) -> bool:
+        res = is_feasible(shape(v))
+        ok, reason = res if isinstance(res, tuple) else (res, None)
+        probes.append({"value": v, "feasible": ok, **({"reason": reason} if not ok and reason else {})})
+        return ok
+
+    lo, hi = 0, None
+    v = max(step, base[axis] // step * step)
+    if check(v):
+        lo = v
+        for _ in range(MAX_DOUBLINGS):
+            v *= 2
+            if not check(v):
+                hi = v
+                break
+            lo = v
+    else:
+        hi = v
+    if hi is None:  # never failed: report the largest size tried as a lower bound
+        return {"axis": axis, "max_value": lo, "max_elements": total_elements(shape(lo)), "bounded": False,
+                "step": step, "base": base, "probes": probes}
+    # lo and hi are multiples of step, so while they are 2+ steps apart the rounded midpoint lies strictly between
+    while hi - lo > max(step, int(lo * rel_tol)):
+        mid = (lo + hi) // 2 // step * step
+        if check(mid):
+            lo = mid
+        else:
+            hi = mid
+    limit = next((p.get("reason") for p in probes if p["value"] == hi), None)
+    return {"axis": axis, "max_value": lo, "max_elements": total_elements(shape(lo)) if lo else 0, "bounded": True,
+            "step": step, "limit_reason": limit, "base": base, "probes": probes}
+
+
+def cache_key(exe: Path, hw: str, kernel_impl: str) -> str:
+    """Implementations sharing one executable (ndrange, adaptivewg) still get separate limits."""
+    return f"{hw}:{kernel_impl}:{exe}"
+
+
+def load_cache(path: Path) -> Dict[str, Dict]:
+    return json.loads(path.read_text()) if path.exists() else {}
+
+
+def save_cache(path: Path, cache: Dict[str, Dict]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(cache, indent=2))
+
+
+def fit_shape(dims: Dict[str, int], families: Dict[str, Dict], clamp: bool) -> Tuple[Optional[Dict[str, int]], Optional[Dict]]:
+    """(dims to run or None if infeasible, info about the check or None if unknown).
+
+    With clamp=True an oversized shape has its dominant axis scaled down to fit,
+    to a multiple of the probe step when one fits and to the largest fitting
+    value otherwise. When not even that fits, info["clamp_failed"] says why.
+    """
+    fam = family_of(dims)
+    limit = families.get(fam)
+    if limit is None or not limit.get("bounded", True):
+        return dims, None
+    max_el = limit["max_elements"]
+    info = {"family": fam, "max_feasible_elements": max_el, "elements": total_elements(dims)}
+    if total_elements(dims) <= max_el:
+        return dims, None
+    if not clamp:
+        return None, info
+    others = total_elements(dims) // dims[fam]
+    step = limit.get("step", 1)
+    largest = max_el // others
+    if largest < 1:
+        return None, {**info, "clamp_failed": f"the other axes alone ({others} elements) exceed the limit"}
+    # a step multiple keeps every swept wg size a divisor, but rounding must not turn a fitting shape into 0
+    clamped = {**dims, fam: largest // step * step or largest}
+    return clamped, {**info, "clamped_from": dims}
@@ -0,0 +1,171 @@
+"""Per-run energy for RUN.py / run-hybrid.py.
+
+Counters are read right before and right after each child process:
+
+    host  Linux RAPL zones under <sysfs>/class/powercap (package-N and dram)
+    gpu   one hwmon energy counter of the benchmarked card under <sysfs>/class/drm
+          (Intel i915/xe), else `nvidia-smi -i` total_energy_consumption, else
+          `rocm-smi -d` energy counter
+
+Only the GPU the benchmark runs on is read: the first entry of the runtime's
+visibility variable (CUDA_VISIBLE_DEVICES, ROCR_VISIBLE_DEVICES,
+ZE_AFFINITY_MASK), else device 0, unless a device is given explicitly. On
+xe, energy1 ("card") already includes energy2 ("pkg"), so a single counter per
+card is read.
+
+The root of both trees comes from SWEEP_POWERCAP_ROOT (default /sys) so a
+mocked tree such as checks/fixtures/energy can stand in for the real one
+without affecting NUMA detection (sweep_affinity reads SWEEP_SYSFS_ROOT).
+RAPL wrap-around is handled with max_energy_range_uj. bytes_per_joule is the
+bytes the kernels moved (throughput x maxIter x time_per_iter, from the run's
+output) divided by the joules of the whole run; startup and teardown energy
+count against it but are not credited with traffic.
+"""
+import json
+import os
+import re
+import shutil
+import subprocess
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sweep_affinity import PCI_VENDOR
+
+SYS_ROOT = Path(os.environ.get("SWEEP_POWERCAP_ROOT", "/sys"))
+
+
+def _read_int(path: Path) -> Optional[int]:
+    try:
+        return int(path.read_text().strip())
+    except (OSError, ValueError):
+        return None
+
+
+def rapl_zones() -> Dict[str, Tuple[Path, int]]:
+    """Readable top-level package zones and their dram subzones: name -> (energy_uj path, wrap range)."""
+    zones = {}
+    for d in sorted((SYS_ROOT / "class" / "powercap").glob("intel-rapl:*")):
+        try:
+            name = (d / "name").read_text().strip()
+        except OSError:
+            continue
+        top_level = d.name.count(":") == 1
+        if not (top_level or name == "dram"):
+            continue
+        if _read_int(d / "energy_uj") is None:  # missing or root-only
+            continue
+        zones[f"{d.name}/{name}"] = (d / "energy_uj", _read_int(d / "max_energy_range_uj") or 0)
+    return zones
+
+
+VISIBLE_DEVICES_ENV = {"h100": "CUDA_VISIBLE_DEVICES", "mi300": "ROCR_VISIBLE_DEVICES", "pvc": "ZE_AFFINITY_MASK"}
+
+
+def gpu_device(hw: Optional[str]) -> str:
+    """Device the benchmark runs on: first visible one for the hw's runtime, else 0."""
+    visible = os.environ.get(VISIBLE_DEVICES_ENV.get(hw or "", ""), "")
+    first = visible.split(",")[0].strip()
+    return first.split(".")[0] if first else "0"  # ZE_AFFINITY_MASK may name a sub-device: "1.0"
+
+
+def gpu_hwmon_counter(hw: Optional[str], device: str) -> Optional[Path]:
+    """One energy counter of the device-th DRM card of the hw's PCI vendor (any vendor if hw is unknown)."""
+    vendor = PCI_VENDOR.get(hw or "")
+    cards = []
+    for d in (SYS_ROOT / "class" / "drm").glob("card*"):
+        if not re.fullmatch(r"card\d+", d.name):  # skip connectors such as card0-DP-1
+            continue
+        try:
+            card_vendor = (d / "device" / "vendor").read_text().strip()
+        except OSError:
+            card_vendor = None
+        if vendor is None or card_vendor == vendor:
+            cards.append(d)
+    cards.sort(key=lambda d: int(d.name[4:]))
+    if not device.isdigit() or int(device) >= len(cards):
+        return None
+    counters = [p for p in sorted((cards[int(device)] / "device" / "hwmon").glob("hwmon*/energy*_input"))
+                if _read_int(p) is not None]
+
+    def label(p: Path) -> str:
+        try:
+            return p.with_name(p.name.replace("_input", "_label")).read_text().strip()
+        except OSError:
+            return ""
+    # xe: energy1 "card" covers energy2 "pkg"; i915 has a single counter
+    return next((p for p in counters if label(p) == "card"), counters[0] if counters else None)
+
+
+def _nvidia_smi_joules(device: str) -> Optional[float]:
+    proc = subprocess.run(["nvidia-smi", "-i", device, "--query-gpu=total_energy_consumption", "--format=csv,noheader,nounits"],
+                          stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, check=False)
+    vals = [float(v) for v in proc.stdout.split() if v.replace(".", "", 1).isdigit()]
+    return vals[0] / 1e3 if proc.returncode == 0 and len(vals) == 1 else None  # mJ
+
+
+def _rocm_smi_joules(device: str) -> Optional[float]:
+    proc = subprocess.run(["rocm-smi", "-d", device, "--showenergycounter", "--json"],
+                          stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, check=False)
+    try:
+        cards = json.loads(proc.stdout)
+    except ValueError:
+        return None
+    vals = [float(v) for card in cards.values() if isinstance(card, dict)
+            for k, v in card.items() if "Accumulated Energy (uJ)" in k]
+    return vals[0] / 1e6 if len(vals) == 1 else None
+
+
+class EnergyMeter:
+    def __init__(self, hw: Optional[str] = None, device: Optional[str] = None):
+        self.rapl = rapl_zones()
+        self.device = device if device is not None else gpu_device(hw)
+        counter = gpu_hwmon_counter(hw, self.device)
+        self.hwmon = [counter] if counter else []
+        self.gpu_tool: Optional[Callable[[str], Optional[float]]] = None
+        if not self.hwmon:
+            for tool, fn in (("nvidia-smi", _nvidia_smi_joules), ("rocm-smi", _rocm_smi_joules)):
+                if shutil.which(tool) and fn(self.device) is not None:
+                    self.gpu_tool, self.gpu_tool_name = fn, tool
+                    break
+
+    def sources(self) -> Dict[str, object]:
+        gpu = [str(p) for p in self.hwmon] or ([f"{self.gpu_tool_name} device {self.device}"] if self.gpu_tool else [])
+        return {"host": list(self.rapl), "gpu": gpu, "gpu_device": self.device if gpu else None}
+
+    def available(self) -> bool:
+        return bool(self.rapl or self.hwmon or self.gpu_tool)
+
+    def read(self) -> Dict[str, object]:
+        return {
+            "t": time.perf_counter(),
+            "rapl": {k: _read_int(p) for k, (p, _) in self.rapl.items()},
+            "hwmon": [_read_int(p) for p in self.hwmon],
+            "tool": self.gpu_tool(self.device) if self.gpu_tool else None,
+        }
+
+    def delta(self, before: Dict, after: Dict, bytes_moved: Optional[float]) -> Dict[str, Optional[float]]:
+        wall = after["t"] - before["t"]
+        host_uj = 0
+        for k, (_, wrap) in self.rapl.items():
+            b, a = before["rapl"][k], after["rapl"][k]
+            if a is None or b is None:
+                continue
+            host_uj += a - b if a >= b else a + wrap - b
+        gpu_j: Optional[float] = None
+        if self.hwmon:
+            gpu_j = sum(a - b for a, b in zip(after["hwmon"], before["hwmon"]) if a is not None and b is not None) / 1e6
+        elif before["tool"] is not None and after["tool"] is not None:
+            gpu_j = after["tool"] - before["tool"]
+        host_j = host_uj / 1e6 if self.rapl else None
+        total = (host_j or 0.0) + (gpu_j or 0.0)
+        watts = total / wall if wall > 0 else None
+        return {
+            "wall_sec": wall,
+            "host_joules": host_j,
+            "gpu_joules": gpu_j,
+            "joules": total,
+            "avg_watts": watts,
+            "bytes": bytes_moved,
+            "bytes_per_joule": bytes_moved / total if bytes_moved and total > 0 else None,
+        }
@@ -0,0 +1,71 @@
+"""Fixed-cost vs per-iteration cost from maxIter sweeps.
+
+For one config, every run's wall time at every maxIter is fitted with
+
+    wall = fixed + per_iter * maxIter
+
+by ordinary least squares. `fixed` is launch + allocation + initialization,
+`per_iter` the steady-state cost; both come with 95% confidence bounds.
+"""
+import math
+import statistics
+from typing import Dict, Optional, Sequence, Tuple
+
+# Two-sided 95% Student t quantiles by degrees of freedom. Between entries the
+# nearest smaller df is used (a slightly wider, conservative interval).
+T95 = {1: 12.706, 2: 4.303, 3: 3.182, 4: 2.776, 5: 2.571, 6: 2.447, 7: 2.365, 8: 2.306, 9: 2.262, 10: 2.228,
+       11: 2.201, 12: 2.179, 13: 2.160, 14: 2.145, 15: 2.131, 16: 2.120, 17: 2.110, 18: 2.101, 19: 2.093,
+       20: 2.086, 21: 2.080, 22: 2.074, 23: 2.069, 24: 2.064, 25: 2.060, 26: 2.056, 27: 2.052, 28: 2.048,
+       29: 2.045, 30: 2.042, 40: 2.021, 60: 2.000, 120: 1.980}
+DEFAULT_FIT_MAXITERS = [10, 50, 200]
+
+
+def t95(df: int) -> float:
+    if df in T95:
+        return T95[df]
+    return T95[max(k for k in T95 if k < df)]
+
+
+def fit_fixed_per_iter(points: Sequence[Tuple[int, float]]) -> Optional[Dict[str, object]]:
+    """OLS fit of (maxIter, wall_sec) points; None with fewer than two distinct maxIter values."""
+    xs = [float(x) for x, _ in points]
+    ys = [float(y) for _, y in points]
+    n = len(xs)
+    if n < 2 or len(set(xs)) < 2:
+        return None
+    mx, my = statistics.mean(xs), statistics.mean(ys)
+    sxx = sum((x - mx) ** 2 for x in xs)
+    slope = sum((x - mx) * (y - my) for x, y in zip(xs, ys)) / sxx
+    intercept = my - slope * mx
+    resid = [y - (intercept + slope * x) for x, y in zip(xs, ys)]
+    ss_res = sum(r * r for r in resid)
+    ss_tot = sum((y - my) ** 2 for y in ys)
+    df = n - 2
+    if df > 0:
+        s2 = ss_res / df
+        se_slope = math.sqrt(s2 / sxx)
+        se_intercept = math.sqrt(s2 * (1.0 / n + mx * mx / sxx))
+        t = t95(df)
+        slope_ci = [slope - t * se_slope, slope + t * se_slope]
+        intercept_ci = [intercept - t * se_intercept, intercept + t * se_intercept]
+    else:  # exactly two points: a line, no error estimate
+        slope_ci = intercept_ci = None
+    return {
+        "fixed_sec": intercept,
+        "fixed_sec_ci95": intercept_ci,
+        "per_iter_sec": slope,
+        "per_iter_sec_ci95": slope_ci,
+        "r2": 1.0 - ss_res / ss_tot if ss_tot > 0 else 1.0,
+        "n_points": n,
+        "maxIters": sorted(set(int(x) for x in xs)),
+    }
+
+
+def predict(fit: Dict[str, object], max_iter: int) -> float:
+    return fit["fixed_sec"] + fit["per_iter_sec"] * max_iter
+
+
+def pick_for_target(fits: Dict[str, Dict[str, object]], target_maxiter: int) -> Optional[str]:
+    """Config key with the lowest predicted wall time at the production maxIter."""
+    usable = {k: f for k, f in fits.items() if f is not None}
+    return min(usable, key=lambda k: predict(usable[k], target_maxiter)) if usable else None
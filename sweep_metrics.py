@@ -0,0 +1,217 @@
+"""Live progress and metrics for long RUN.py / run-hybrid.py sweeps.
+
+The runners call `SweepProgress.run_finished()` after every child process and
+`config_finished()` after every (case, maxIter, wg) config; runs a config never
+launched (it stops at the first failure) are dropped from the total. The
+tracker can export Prometheus text to a file and/or a local HTTP endpoint, and
+draw a compact TTY dashboard. `archive_log()` stores full child output gzipped so it
+no longer has to go to stdout.
+"""
+import gzip
+import os
+import statistics
+import sys
+import threading
+import time
+from collections import defaultdict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Deque, Dict, List, Optional
+
+ROLLING_WINDOW = 20
+
+
+def format_duration(sec: float) -> str:
+    """H:MM:SS, with a day count for multi-day sweeps ("2d 03:04:05"); "--" if unknown."""
+    if sec != sec or sec == float("inf"):
+        return "--"
+    days, rest = divmod(int(round(sec)), 86400)
+    hours, rest = divmod(rest, 3600)
+    clock = f"{hours:02d}:{rest // 60:02d}:{rest % 60:02d}"
+    return f"{days}d {clock}" if days else clock
+
+
+def archive_log(log_dir: Path, name: str, text: str) -> Path:
+    """Write one run's full stdout+stderr to <log_dir>/<name>.log.gz."""
+    log_dir.mkdir(parents=True, exist_ok=True)
+    path = log_dir / f"{name}.log.gz"
+    with gzip.open(path, "wt") as f:
+        f.write(text)
+    return path
+
+
+class SweepProgress:
+    def __init__(self, total_configs: int, runs_per_config: int, labels: Optional[Dict[str, str]] = None,
+                 metrics_file: Optional[Path] = None, metrics_port: Optional[int] = None,
+                 dashboard: bool = False):
+        self.total_configs = total_configs
+        self.runs_per_config = runs_per_config
+        self.labels = labels or {}
+        self.metrics_file = metrics_file
+        self.dashboard = dashboard
+
+        self.configs_done = 0
+        self.runs_done = 0
+        self.runs_failed = 0
+        self.runs_skipped = 0  # runs never launched because their config aborted early
+        self.current = ""
+        self._config_runs = 0
+        self.start = time.monotonic()
+        self.recent: Dict[str, Deque[float]] = defaultdict(lambda: deque(maxlen=ROLLING_WINDOW))
+        self.best: Dict[str, float] = {}
+        self.failures: Dict[str, int] = defaultdict(int)
+
+        self._lock = threading.Lock()
+        self._drawn_lines = 0
+        self._drawn_configs = 0
+        self._tty = sys.stdout.isatty()
+        self._server: Optional[ThreadingHTTPServer] = None
+        if metrics_port is not None:
+            self._serve(metrics_port)
+
+    # --- updates from the runner ---
+
+    def config_started(self, label: str) -> None:
+        with self._lock:
+            self.current = label
+            self._config_runs = 0
+        self._publish()
+
+    def run_finished(self, case: str, ok: bool, bytes_per_sec: Optional[float]) -> None:
+        with self._lock:
+            self.runs_done += 1
+            self._config_runs += 1
+            if not ok or bytes_per_sec is None:
+                self.runs_failed += 1
+                self.failures[case] += 1
+            else:
+                gbps = bytes_per_sec / 1e9
+                self.recent[case].append(gbps)
+                self.best[case] = max(self.best.get(case, 0.0), gbps)
+        self._publish()
+
+    def config_finished(self) -> None:
+        with self._lock:
+            self.configs_done += 1
+            self.runs_skipped += max(0, self.runs_per_config - self._config_runs)
+        self._publish()
+
+    def close(self) -> None:
+        self._publish()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server = None
+
+    # --- derived values ---
+
+    def _snapshot(self) -> Dict[str, object]:
+        with self._lock:
+            elapsed = time.monotonic() - self.start
+            total_runs = self.total_configs * self.runs_per_config - self.runs_skipped
+            remaining = max(0, total_runs - self.runs_done)
+            rate = self.runs_done / elapsed if elapsed > 0 else 0.0
+            return {
+                "elapsed": elapsed,
+                "configs_done": self.configs_done,
+                "configs_total": self.total_configs,
+                "runs_done": self.runs_done,
+                "runs_remaining": remaining,
+                "runs_failed": self.runs_failed,
+                "rate": rate,
+                "eta": remaining / rate if rate > 0 else float("nan"),
+                "current": self.current,
+                "median_gbps": {c: statistics.median(v) for c, v in self.recent.items() if v},
+                "best_gbps": dict(self.best),
+                "failures": dict(self.failures),
+            }
+
+    def prometheus_text(self) -> str:
+        s = self._snapshot()
+        base = ",".join(f'{k}="{v}"' for k, v in sorted(self.labels.items()))
+
+        def lbl(**extra: str) -> str:
+            parts = [base] if base else []
+            parts += [f'{k}="{v}"' for k, v in extra.items()]
+            return "{" + ",".join(parts) + "}" if parts else ""
+
+        lines: List[str] = []
+
+        def metric(name: str, kind: str, help_: str, samples: List[tuple]) -> None:
+            lines.append(f"# HELP {name} {help_}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                lines.append(f"{name}{labels} {value}")
+
+        metric("sweep_configs_total", "gauge", "Configs in this sweep.", [(lbl(), s["configs_total"])])
+        metric("sweep_configs_done", "gauge", "Configs finished.", [(lbl(), s["configs_done"])])
+        metric("sweep_runs_done_total", "counter", "Child runs finished.", [(lbl(), s["runs_done"])])
+        metric("sweep_runs_remaining", "gauge", "Child runs still to launch.", [(lbl(), s["runs_remaining"])])
+        metric("sweep_runs_failed_total", "counter", "Child runs that failed or were unparsable.",
+               [(lbl(case=c), n) for c, n in sorted(s["failures"].items())] or [(lbl(), 0)])
+        metric("sweep_runs_per_second", "gauge", "Average run rate since start.", [(lbl(), f"{s['rate']:.6g}")])
+        metric("sweep_eta_seconds", "gauge", "Estimated time to completion.", [(lbl(), f"{s['eta']:.6g}")])
+        metric("sweep_case_median_gbps", "gauge", f"Rolling median GB/s over the last {ROLLING_WINDOW} runs.",
+               [(lbl(case=c), f"{v:.6g}") for c, v in sorted(s["median_gbps"].items())])
+        metric("sweep_case_best_gbps", "gauge", "Best single-run GB/s so far.",
+               [(lbl(case=c), f"{v:.6g}") for c, v in sorted(s["best_gbps"].items())])
+        return "\n".join(lines) + "\n"
+
+    def dashboard_lines(self) -> List[str]:
+        s = self._snapshot()
+        eta = format_duration(s["eta"])
+        lines = [
+            f"configs {s['configs_done']}/{s['configs_total']}  runs {s['runs_done']} done, "
+            f"{s['runs_remaining']} left, {s['runs_failed']} failed  "
+            f"{s['rate']:.2f} runs/s  ETA {eta}",
+            f"now: {s['current']}",
+        ]
+        for case in sorted(set(s["median_gbps"]) | set(s["failures"])):
+            med = s["median_gbps"].get(case, float("nan"))
+            best = s["best_gbps"].get(case, float("nan"))
+            lines.append(f"  {case:<8} median {med:10.3f} GB/s  best {best:10.3f} GB/s  "
+                         f"fail {s['failures'].get(case, 0)}")
+        return lines
+
+    # --- outputs ---
+
+    def _publish(self) -> None:
+        if self.metrics_file is not None:
+            tmp = self.metrics_file.with_suffix(self.metrics_file.suffix + ".tmp")
+            tmp.write_text(self.prometheus_text())
+            os.replace(tmp, self.metrics_file)
+        if self.dashboard:
+            self._draw()
+
+    def _draw(self) -> None:
+        lines = self.dashboard_lines()
+        if self._tty:
+            if self._drawn_lines:
+                sys.stdout.write(f"\x1b[{self._drawn_lines}F\x1b[J")
+            self._drawn_lines = len(lines)
+            sys.stdout.write("\n".join(lines) + "\n")
+        elif self.configs_done != self._drawn_configs:
+            # not a terminal (e.g. redirected to a file): one status line per finished config
+            self._drawn_configs = self.configs_done
+            sys.stdout.write(lines[0] + "\n")
+        sys.stdout.flush()
+
+    def _serve(self, port: int) -> None:
+        progress = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.rstrip("/") not in ("", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = progress.prometheus_text().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
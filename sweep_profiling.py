@@ -0,0 +1,241 @@
+"""Profiler-wrapped runs for RUN.py / run-hybrid.py.
+
+A profiler is a command prefix (with an `{out}` placeholder for its output
+base path), an optional post-processing command, and a parser that turns what
+it wrote into flat counter columns:
+
+    dram_bytes, cache_hit_rate, l2_hit_rate, kernel_time_ns, kernel_launches
+
+plus raw `<profiler>_<event>` columns. Every profiled run is paired with an
+unprofiled run of the same config launched right before it, so the overhead
+of the profiler itself is recorded next to its counters.
+"""
+import csv
+import io
+import shlex
+import shutil
+import statistics
+import subprocess
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+PERF_EVENTS = "task-clock,cycles,instructions,cache-references,cache-misses,LLC-loads,LLC-load-misses"
+NCU_METRICS = "dram__bytes.sum,lts__t_sector_hit_rate.pct,gpu__time_duration.sum"
+
+# Vendor tool tried first for each --hw; falls back to perf when not on PATH.
+VENDOR_PROFILER = {"h100": "ncu", "mi300": "rocprof", "pvc": "unitrace"}
+
+_SIZE = {"byte": 1, "kbyte": 1e3, "mbyte": 1e6, "gbyte": 1e9, "kib": 2**10, "mib": 2**20, "gib": 2**30}
+_TIME_NS = {"nsecond": 1, "usecond": 1e3, "msecond": 1e6, "second": 1e9}
+
+
+def _to_float(s: str) -> Optional[float]:
+    try:
+        return float(s.replace(",", ""))
+    except (AttributeError, ValueError):
+        return None
+
+
+def _csv_after(text: str, header_start: str) -> List[Dict[str, str]]:
+    """Rows of the first CSV table whose header line starts with `header_start`."""
+    lines = text.splitlines()
+    for i, line in enumerate(lines):
+        if line.strip().startswith(header_start):
+            body = []
+            for row in lines[i:]:
+                if not row.strip():
+                    break
+                body.append(row)
+            return list(csv.DictReader(io.StringIO("\n".join(body)), skipinitialspace=True))
+    return []
+
+
+# --- Parsers: (profiler output files, child stdout+stderr) -> counter columns ---
+
+def parse_perf_stat(files: List[Path], out: str) -> Dict[str, float]:
+    cols: Dict[str, float] = {}
+    for f in files:
+        for row in csv.reader(f.read_text().splitlines()):
+            if len(row) < 3 or row[0].startswith("#"):
+                continue
+            value, unit, event = _to_float(row[0]), row[1].strip().lower(), row[2].strip()
+            if value is None:  # <not counted> / <not supported>
+                continue
+            event = event.split(":")[0]
+            cols[f"perf_{event}"] = value
+            if "cas_count" in event:  # uncore IMC events, reported in MiB
+                cols["dram_bytes"] = cols.get("dram_bytes", 0.0) + value * _SIZE.get(unit, 1)
+    if cols.get("perf_cache-references"):
+        cols["cache_hit_rate"] = 1.0 - cols.get("perf_cache-misses", 0.0) / cols["perf_cache-references"]
+    if cols.get("perf_LLC-loads"):
+        cols["llc_hit_rate"] = 1.0 - cols.get("perf_LLC-load-misses", 0.0) / cols["perf_LLC-loads"]
+    return cols
+
+
+def parse_ncu(files: List[Path], out: str) -> Dict[str, float]:
+    dram, hit, dur, kernels = 0.0, [], 0.0, set()
+    for f in files:
+        for row in _csv_after(f.read_text(), '"ID"'):
+            name, unit, value = row.get("Metric Name"), (row.get("Metric Unit") or "").lower(), _to_float(row.get("Metric Value", ""))
+            if value is None:
+                continue
+            kernels.add(row.get("ID"))
+            if name == "dram__bytes.sum":
+                dram += value * _SIZE.get(unit, 1)
+            elif name == "lts__t_sector_hit_rate.pct":
+                hit.append(value / 100.0)
+            elif name == "gpu__time_duration.sum":
+                dur += value * _TIME_NS.get(unit, 1)
+    cols = {"dram_bytes": dram, "kernel_time_ns": dur, "kernel_launches": float(len(kernels))}
+    if hit:
+        cols["l2_hit_rate"] = statistics.mean(hit)
+    return cols if kernels else {}
+
+
+def parse_nsys(files: List[Path], out: str) -> Dict[str, float]:
+    # `out` holds the post-processing `nsys stats --format csv` output
+    rows = _csv_after(out, '"Time (%)"') or _csv_after(out, "Time (%)")
+    if not rows:
+        return {}
+    return {
+        "kernel_time_ns": sum(_to_float(r.get("Total Time (ns)", "")) or 0.0 for r in rows),
+        "kernel_launches": sum(_to_float(r.get("Instances", "")) or 0.0 for r in rows),
+    }
+
+
+def parse_rocprof(files: List[Path], out: str) -> Dict[str, float]:
+    cols: Dict[str, float] = {}
+    for f in files:
+        rows = list(csv.DictReader(io.StringIO(f.read_text())))
+        if not rows:
+            continue
+        if f.name.endswith(".stats.csv"):
+            cols["kernel_time_ns"] = sum(_to_float(r.get("TotalDurationNs", "")) or 0.0 for r in rows)
+            cols["kernel_launches"] = sum(_to_float(r.get("Calls", "")) or 0.0 for r in rows)
+        elif "FETCH_SIZE" in rows[0] or "L2CacheHit" in rows[0]:
+            # per-dispatch counters (needs a pmc input file passed via --profiler-cmd ... -i pmc.txt)
+            fetch = sum(_to_float(r.get("FETCH_SIZE", "")) or 0.0 for r in rows)
+            write = sum(_to_float(r.get("WRITE_SIZE", "")) or 0.0 for r in rows)
+            cols["dram_bytes"] = (fetch + write) * 1024  # rocprof reports KB
+            hits = [_to_float(r["L2CacheHit"]) for r in rows if _to_float(r.get("L2CacheHit", "")) is not None]
+            if hits:
+                cols["l2_hit_rate"] = statistics.mean(hits) / 100.0
+    return cols
+
+
+def parse_unitrace(files: List[Path], out: str) -> Dict[str, float]:
+    text = "\n".join(f.read_text(errors="replace") for f in files) + "\n" + out
+    rows = []
+    lines = text.splitlines()
+    for i, line in enumerate(lines):
+        if line.strip().startswith("Kernel,") and "Time (ns)" in line:
+            rows = _csv_after("\n".join(lines[i:]), "Kernel,")
+            break
+    if not rows:
+        return {}
+    return {
+        "kernel_time_ns": sum(_to_float(r.get("Time (ns)", "")) or 0.0 for r in rows),
+        "kernel_launches": sum(_to_float(r.get("Calls", "")) or 0.0 for r in rows),
+    }
+
+
+PROFILERS: Dict[str, Dict] = {
+    "perf": {
+        "cmd": ["perf", "stat", "-x", ",", "-o", "{out}.perf.csv", "-e", PERF_EVENTS, "--"],
+        "files": "{out}.perf.csv",
+        "parse": parse_perf_stat,
+    },
+    "ncu": {
+        "cmd": ["ncu", "--csv", "--log-file", "{out}.ncu.csv", "--metrics", NCU_METRICS],
+        "files": "{out}.ncu.csv",
+        "parse": parse_ncu,
+    },
+    "nsys": {
+        "cmd": ["nsys", "profile", "--force-overwrite=true", "--stats=false", "-o", "{out}"],
+        "post": ["nsys", "stats", "-q", "--report", "cuda_gpu_kern_sum", "--format", "csv", "--output", "-", "{out}.nsys-rep"],
+        "files": None,
+        "parse": parse_nsys,
+    },
+    "rocprof": {
+        "cmd": ["rocprof", "--stats", "-o", "{out}.csv"],
+        "files": "{out}*.csv",
+        "parse": parse_rocprof,
+    },
+    "unitrace": {
+        "cmd": ["unitrace", "--device-timing", "--output", "{out}.unitrace"],
+        "files": "{out}.unitrace*",
+        "parse": parse_unitrace,
+    },
+}
+
+
+def resolve_profiler(name: str, hw: str, cmd_override: Optional[str] = None) -> Tuple[str, Dict]:
+    """Pick a profiler ('auto' = vendor tool for hw if installed, else perf) and check it is on PATH."""
+    if name == "auto":
+        vendor = VENDOR_PROFILER.get(hw)
+        name = vendor if vendor and shutil.which(vendor) else "perf"
+    if name not in PROFILERS:
+        raise SystemExit(f"Unknown profiler: {name}. Available: auto, {', '.join(PROFILERS)}")
+    spec = dict(PROFILERS[name])
+    if cmd_override:
+        spec["cmd"] = shlex.split(cmd_override)
+    if shutil.which(spec["cmd"][0]) is None:
+        raise SystemExit(f"Profiler not found on PATH: {spec['cmd'][0]}")
+    return name, spec
+
+
+def _fill(tokens: Sequence[str], out: Path) -> List[str]:
+    return [t.replace("{out}", str(out)) for t in tokens]
+
+
+def _timed(run: Callable[[Sequence[str]], Tuple[bool, str]], prefix: Sequence[str]) -> Tuple[bool, str, float]:
+    t0 = time.perf_counter()
+    ok, out = run(prefix)
+    return ok, out, time.perf_counter() - t0
+
+
+def profile_pairs(run: Callable[[Sequence[str]], Tuple[bool, str]], name: str, spec: Dict, pairs: int,
+                  parse_perf: Callable[[str], Optional[float]], out_base: Path) -> Dict:
+    """Run `pairs` x (unprofiled, profiled) and return per-pair records plus medians.
+
+    `run(prefix)` launches the config with `prefix` prepended to its command line.
+    """
+    out_base.parent.mkdir(parents=True, exist_ok=True)
+    records = []
+    for k in range(pairs):
+        out = out_base.with_name(f"{out_base.name}_p{k+1}")
+        base_ok, base_out, base_wall = _timed(run, [])
+        prof_ok, prof_out, prof_wall = _timed(run, _fill(spec["cmd"], out))
+        post_out = ""
+        if prof_ok and spec.get("post"):
+            proc = subprocess.run(_fill(spec["post"], out), stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, check=False)
+            post_out = proc.stdout
+        files = sorted(out.parent.glob(Path(spec["files"].replace("{out}", out.name)).name)) if spec.get("files") else []
+        counters = spec["parse"](files, post_out or prof_out) if prof_ok else {}
+        base_bps = parse_perf(base_out) if base_ok else None
+        prof_bps = parse_perf(prof_out) if prof_ok else None
+        records.append({
+            "status": "ok" if base_ok and prof_ok else "error",
+            "counters": counters,
+            "wall_sec": prof_wall,
+            "baseline_wall_sec": base_wall,
+            "wall_overhead": prof_wall / base_wall - 1.0 if base_ok and prof_ok and base_wall > 0 else None,
+            "bytes_per_sec": prof_bps,
+            "baseline_bytes_per_sec": base_bps,
+            "throughput_overhead": 1.0 - prof_bps / base_bps if prof_bps and base_bps else None,
+            "output_files": [str(f) for f in files],
+        })
+
+    def med(key: str):
+        vals = [r[key] for r in records if r[key] is not None]
+        return statistics.median(vals) if vals else None
+
+    columns = sorted({c for r in records for c in r["counters"]})
+    return {
+        "profiler": name,
+        "pairs": records,
+        "counters": {c: statistics.median([r["counters"][c] for r in records if c in r["counters"]]) for c in columns},
+        "wall_overhead": med("wall_overhead"),
+        "throughput_overhead": med("throughput_overhead"),
+    }
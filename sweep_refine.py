@@ -0,0 +1,66 @@
+"""Adaptive problem-size refinement for size sweeps.
+
+Start from a coarse ladder of sizes, then repeatedly bisect the neighbour
+interval whose throughput changes the most (relative change
+|a - b| / max(a, b), so a failed point at 0 counts as a full change) until the
+point budget is spent. Points end up concentrated around knees (cache spill,
+occupancy cliff) instead of on flat plateaus. When several curves are compared
+at the same sizes, `evaluate` returns one throughput per curve and an
+interval's change is the largest change of any curve, so every curve is
+measured at every chosen size.
+"""
+import math
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+Throughput = Union[float, Sequence[float]]
+
+
+def relative_change(a: float, b: float) -> float:
+    top = max(abs(a), abs(b))
+    return abs(a - b) / top if top > 0 else 0.0
+
+
+def curves_change(a: Throughput, b: Throughput) -> float:
+    """relative_change of one curve, or the steepest one of several evaluated together."""
+    if isinstance(a, (int, float)):
+        return relative_change(a, b)
+    return max((relative_change(x, y) for x, y in zip(a, b)), default=0.0)
+
+
+def split_point(lo: int, hi: int) -> Optional[int]:
+    """Geometric midpoint of (lo, hi), falling back to the arithmetic one; None if no integer lies between."""
+    if hi - lo < 2:
+        return None
+    mid = round(math.sqrt(lo * hi)) if lo > 0 else (lo + hi) // 2
+    if not lo < mid < hi:
+        mid = (lo + hi) // 2
+    return mid
+
+
+def refine_sizes(evaluate: Callable[[int], Throughput], coarse: Sequence[int], budget: int,
+                 min_change: float = 0.0) -> Tuple[Dict[int, Throughput], List[Dict[str, object]]]:
+    """Evaluate `coarse`, then bisect the steepest interval until `budget` points are used.
+
+    Returns {size: throughput} and the refinement log (size, interval, change) in evaluation order.
+    Stops early when no interval can be split or the steepest change is below `min_change`.
+    """
+    values: Dict[int, Throughput] = {}
+    log: List[Dict[str, object]] = []
+    for n in sorted(set(coarse))[:budget]:
+        values[n] = evaluate(n)
+        log.append({"size": n, "phase": "coarse"})
+    while len(values) < budget:
+        sizes = sorted(values)
+        candidates = []
+        for lo, hi in zip(sizes[:-1], sizes[1:]):
+            mid = split_point(lo, hi)
+            if mid is not None:
+                candidates.append((curves_change(values[lo], values[hi]), lo, hi, mid))
+        if not candidates:
+            break
+        change, lo, hi, mid = max(candidates)
+        if change < min_change:
+            break
+        values[mid] = evaluate(mid)
+        log.append({"size": mid, "phase": "refine", "interval": [lo, hi], "change": change})
+    return dict(sorted(values.items())), log
@@ -0,0 +1,129 @@
+"""Startup latency (cold vs warm JIT caches) for RUN.py / run-hybrid.py.
+
+Every repetition is a fresh process, so SYCL runtime init and JIT compilation
+are paid on each run unless the runtimes' persistent kernel caches are on.
+`cache_env()` points all of them (DPC++, AdaptiveCpp, CUDA driver, Level Zero,
+ROCm comgr) at one private directory per sweep; `cache_env(None)` disables
+them. `timed_run()` streams the child's output to timestamp
+
+    process start -> first output line -> first kernel launch -> exit
+
+and splits the wall time into steady state (maxIter x time_per_iter, as
+printed by the app) and startup (everything else).
+"""
+import os
+import re
+import shutil
+import statistics
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence
+
+TIME_PER_ITER_RE = re.compile(r"time_per_iter\s*\(sec\)\s*:\s*([0-9]*\.?[0-9]+(?:[eE][-+]?\d+)?)", re.IGNORECASE)
+# Lines printed by the runtime tracers below when the first kernel is launched
+KERNEL_LAUNCH_RE = re.compile(r"(urEnqueueKernelLaunch|piEnqueueKernelLaunch|cuLaunchKernel|hipModuleLaunchKernel|zeCommandListAppendLaunchKernel)")
+TRACE_ENV = {"SYCL_UR_TRACE": "2", "SYCL_PI_TRACE": "2"}
+
+
+def cache_env(cache_dir: Optional[Path]) -> Dict[str, str]:
+    """Environment enabling persistent kernel caches under cache_dir, or disabling them (None)."""
+    if cache_dir is None:
+        return {
+            "SYCL_CACHE_PERSISTENT": "0",
+            "CUDA_CACHE_DISABLE": "1",
+            "NEO_CACHE_PERSISTENT": "0",
+            "AMD_COMGR_CACHE": "0",
+        }
+    return {
+        "SYCL_CACHE_PERSISTENT": "1",
+        "SYCL_CACHE_DIR": str(cache_dir / "sycl"),
+        "ACPP_APPDB_DIR": str(cache_dir / "acpp"),
+        "CUDA_CACHE_DISABLE": "0",
+        "CUDA_CACHE_PATH": str(cache_dir / "cuda"),
+        "NEO_CACHE_PERSISTENT": "1",
+        "NEO_CACHE_DIR": str(cache_dir / "neo"),
+        "AMD_COMGR_CACHE": "1",
+        "AMD_COMGR_CACHE_DIR": str(cache_dir / "comgr"),
+    }
+
+
+def timed_run(cmd: Sequence[str], env: Dict[str, str], preexec_fn: Optional[Callable[[], None]] = None,
+              max_iter: Optional[int] = None) -> Dict:
+    t0 = time.perf_counter()
+    first_output = first_kernel = None
+    lines: List[str] = []
+    try:
+        proc = subprocess.Popen(list(cmd), stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True,
+                                env={**os.environ, **env}, preexec_fn=preexec_fn)
+    except Exception as e:
+        return {"ok": False, "output": f"exception: {e}"}
+    for line in proc.stdout:
+        now = time.perf_counter() - t0
+        if first_output is None:
+            first_output = now
+        if first_kernel is None and KERNEL_LAUNCH_RE.search(line):
+            first_kernel = now
+        lines.append(line)
+    proc.wait()
+    total = time.perf_counter() - t0
+    out = "".join(lines)
+    m = TIME_PER_ITER_RE.search(out)
+    steady = float(m.group(1)) * max_iter if m and max_iter else None
+    return {
+        "ok": proc.returncode == 0,
+        "output": out,
+        "total_sec": total,
+        "first_output_sec": first_output,
+        "first_kernel_sec": first_kernel,
+        "steady_sec": steady,
+        "startup_sec": total - steady if steady is not None else None,
+    }
+
+
+def warm_cache(cmd: Sequence[str], cache_dir: Path, preexec_fn: Optional[Callable[[], None]] = None) -> bool:
+    """One throwaway run that fills cache_dir; call once per executable before measuring."""
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    proc = subprocess.run(list(cmd), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False,
+                          env={**os.environ, **cache_env(cache_dir)}, preexec_fn=preexec_fn)
+    return proc.returncode == 0
+
+
+def _stats(vals: List[float]) -> Optional[Dict[str, float]]:
+    """mean/median/stdev, or None when nothing was measured (never fake zeros)."""
+    if not vals:
+        return None
+    return {
+        "mean": statistics.mean(vals),
+        "median": statistics.median(vals),
+        "stdev": statistics.stdev(vals) if len(vals) > 1 else 0.0,
+    }
+
+
+def startup_latency(cmd: Sequence[str], runs: int, warm_dir: Path, max_iter: int,
+                    preexec_fn: Optional[Callable[[], None]] = None, trace: bool = False) -> Dict:
+    """Alternate cold runs (caches off, fresh empty dir) and warm runs (pre-warmed warm_dir)."""
+    extra = TRACE_ENV if trace else {}
+    records: Dict[str, List[Dict]] = {"cold": [], "warm": []}
+    for _ in range(runs):
+        cold_dir = Path(tempfile.mkdtemp(prefix="jit-cold-"))
+        try:
+            env = {**cache_env(cold_dir), **cache_env(None), **extra}
+            records["cold"].append(timed_run(cmd, env, preexec_fn, max_iter))
+        finally:
+            shutil.rmtree(cold_dir, ignore_errors=True)
+        records["warm"].append(timed_run(cmd, {**cache_env(warm_dir), **extra}, preexec_fn, max_iter))
+
+    result: Dict = {}
+    for mode, recs in records.items():
+        ok = [r for r in recs if r["ok"]]
+        result[mode] = {"runs_completed": len(ok), "status": "ok" if len(ok) == len(recs) else "error"}
+        # a key is left out when no run measured it (no tracing, no time_per_iter line, ...)
+        for key in ("total_sec", "first_output_sec", "first_kernel_sec", "steady_sec", "startup_sec"):
+            stats = _stats([r[key] for r in ok if r.get(key) is not None])
+            if stats is not None:
+                result[mode][key] = {**stats, "unit": "sec"}
+    cold, warm = (result[mode].get("startup_sec") for mode in ("cold", "warm"))
+    result["jit_saving_sec"] = cold["median"] - warm["median"] if cold and warm else None
+    return result